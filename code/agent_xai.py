@@ -30,62 +30,143 @@ from textwrap import indent
 import requests
 import argparse
 import logging
+import threading
+import time
+
+from artifacts import ArtifactStore, count_findings, text_hash
+from cancel import CancelToken, CancelledError, EXIT_CANCELLED
+from compress import open_text
+from blobs import BlobStore, blob_path
+from events import EventLog, body_summary
+from log_index import LogIndexWriter
+from log_writer import FLUSH_MODES, LOG_LEVELS, PHASES, LogFilter, LogWriter, parse_size, tail_path
+from journal import Journal, replay_journal
+from replay import MISS_POLICIES, ReplayMissError, ResponseCache, session_of
+from run_store import RunStore
 
 # --- CONFIGURATION ---
 MODEL_NAME = "grok-4-0709" 
 # Use the Generative Language API endpoint, which is simpler for API key auth
 API_URL = f"https://api.x.ai/v1/chat/completions"
 
-# Global variables for logging
-_log_file = None
+# Global variables for logging: the background writer of the log file and its index (<log>.idx)
+_log_writer = None
+
+# What is logged (--log-level, --log-phases), and the phase of the API call each thread is in
+_log_filter = LogFilter()
+_current_phase = threading.local()
 original_print = print
 
-def log_print(*args, **kwargs):
+# Cancelled by SIGTERM/SIGINT or by the --cancel-file appearing
+_cancel_token = CancelToken()
+
+# Record/replay store for API responses (--record / --replay)
+_response_cache = None
+
+# SQLite store of runs, calls, solutions and verdicts (--store)
+_run_store = None
+
+# Content-addressed store of candidate solutions and their verdicts (--artifacts)
+_artifacts = None
+
+# Structured JSONL event log (--events); full payloads and responses in the logs (--log-bodies)
+_events = None
+_log_bodies = False
+
+# Long texts of the logged bodies, written once and referenced by hash (--intern-blobs)
+_blobs = None
+
+def log_print(*args, level="summary", phase=None, **kwargs):
     """
-    Custom print function that writes to both stdout and log file.
+    Custom print function that writes to both stdout and log file. Lines
+    above the --log-level, or of a phase excluded by --log-phases (by default
+    the phase of the thread's last API call), are dropped.
     """
+    if not _log_filter.enabled(level, phase or getattr(_current_phase, "name", None)):
+        return
     # Convert all arguments to strings and join them
     message = ' '.join(str(arg) for arg in args)
     
     # Add timestamp to lines starting with ">>>>>"
-    if message.startswith('>>>>>'):
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        message = f"[{timestamp}] {message}"
+    marker = message.startswith('>>>>>')
+    if marker:
+        message = f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}"
     
-    # Print to stdout
-    original_print(message)
-    
-    # Also write to log file if specified
-    if _log_file is not None:
-        _log_file.write(message + '\n')
-        _log_file.flush()  # Ensure immediate writing
+    # With a log file, the writer prints to stdout too, in the same order
+    writer = _log_writer
+    if writer is not None:
+        writer.write(message, marker, keep=level == "quiet")
+    else:
+        original_print(message)
 
 # Replace the built-in print function
 print = log_print
 
-def set_log_file(log_file_path):
-    """Set the log file for output."""
-    global _log_file
+def set_log_file(log_file_path, append=False, flush="interval", max_bytes=None):
+    """
+    Set the log file for output. Appends to an existing log if append is set.
+    The log is compressed if its name ends in .gz or .zst. Runs, iterations,
+    phase markers and the final solution are indexed in <log>.idx. Lines are
+    written by a background thread, flushed as set by flush (see log_writer.py).
+    With max_bytes, the log keeps its head and its tail within about that size.
+    """
+    global _log_writer
     if log_file_path:
         try:
-            _log_file = open(log_file_path, 'w', encoding='utf-8')
+            log_file = open_text(log_file_path, 'a' if append else 'w')
+            _log_writer = LogWriter(log_file, LogIndexWriter(log_file_path, append), flush, max_bytes=max_bytes,
+                                    tail=tail_path(log_file_path) if max_bytes else None, append=append)
             return True
         except Exception as e:
-            print(f"Error opening log file {log_file_path}: {e}")
+            print(f"Error opening log file {log_file_path}: {e}", level="quiet")
             return False
     return True
 
 def close_log_file():
-    """Close the log file if it's open."""
-    global _log_file
-    if _log_file is not None:
-        _log_file.close()
-        _log_file = None
+    """Flush and close the log file if it's open."""
+    global _log_writer
+    if _log_writer is not None:
+        writer, _log_writer = _log_writer, None
+        writer.close()
+
+def log_index(kind, **fields):
+    """Index the next line of the log as the start of a run, iteration or the final solution."""
+    writer = _log_writer
+    if writer is not None:
+        writer.mark(kind, **fields)
+
+def log_body(data, phase=None, body=None):
+    """
+    Print a request payload or raw response: in full with --log-bodies, else
+    its size and hash. body is the payload as serialized for the request.
+    """
+    if not _log_filter.enabled("debug", phase or getattr(_current_phase, "name", None)):
+        return
+    if _log_bodies:
+        print(json.dumps(_blobs.intern(data) if _blobs is not None else data, indent=4), level="debug", phase=phase)
+    else:
+        print(body_summary(data, body), level="debug", phase=phase)
+
+def log_text(text, phase=None):
+    """Print a solution, verification log or bug report (debug level)."""
+    if _log_filter.enabled("debug", phase or getattr(_current_phase, "name", None)):
+        print(json.dumps(text, indent=4), level="debug", phase=phase)
+
+# Memory files are append-only journals, one open writer per file
+_memory_journals = {}
+_memory_lock = threading.Lock()
+_memory_fsync = "interval"
 
-def save_memory(memory_file, problem_statement, other_prompts, current_iteration, max_runs, solution=None, verify=None):
+def save_memory(memory_file, problem_statement, other_prompts, current_iteration, max_runs, solution=None, verify=None,
+                good_verify=None, correct_count=None, error_count=None):
     """
-    Save the current state to a memory file.
+    Save the current state to a memory file by appending the fields that
+    changed since the last checkpoint to its journal.
+
+    current_iteration is the last completed iteration of the correction loop
+    (-1 right after the initial exploration). With good_verify and the
+    counters the checkpoint holds the full loop state, so a resumed agent
+    continues with the next iteration without verifying the solution again.
     """
     memory = {
         "problem_statement": problem_statement,
@@ -96,27 +177,44 @@ def save_memory(memory_file, problem_statement, other_prompts, current_iteration
         "verify": verify,
         "timestamp": __import__('datetime').datetime.now().isoformat()
     }
+    if good_verify is not None:
+        memory["good_verify"] = good_verify
+        memory["correct_count"] = correct_count
+        memory["error_count"] = error_count
     
     try:
-        with open(memory_file, 'w', encoding='utf-8') as f:
-            json.dump(memory, f, indent=2, ensure_ascii=False)
+        with _memory_lock:
+            journal = _memory_journals.get(memory_file)
+            if journal is None:
+                journal = _memory_journals[memory_file] = Journal(memory_file, fsync=_memory_fsync)
+        journal.append(memory)
         print(f"Memory saved to {memory_file}")
         return True
     except Exception as e:
-        print(f"Error saving memory to {memory_file}: {e}")
+        print(f"Error saving memory to {memory_file}: {e}", level="quiet")
         return False
 
+def close_memory():
+    """Close the memory journals, syncing their last checkpoint to disk."""
+    with _memory_lock:
+        journals = list(_memory_journals.values())
+        _memory_journals.clear()
+    for journal in journals:
+        try:
+            journal.close()
+        except Exception as e:
+            print(f"Error closing memory file {journal.path}: {e}", level="quiet")
+
 def load_memory(memory_file):
     """
-    Load the state from a memory file.
+    Load the state from a memory file by replaying its journal.
     """
     try:
-        with open(memory_file, 'r', encoding='utf-8') as f:
-            memory = json.load(f)
+        memory = replay_journal(memory_file)
         print(f"Memory loaded from {memory_file}")
         return memory
     except Exception as e:
-        print(f"Error loading memory from {memory_file}: {e}")
+        print(f"Error loading memory from {memory_file}: {e}", level="quiet")
         return None
 
 step1_prompt = """
@@ -235,10 +333,12 @@ def get_api_key():
     Exits if the key is not found.
     """
 
+    if _response_cache is not None and _response_cache.offline:
+        return ""
     api_key = os.getenv("XAI_API_KEY")
     if not api_key:
-        print("Error: XAI_API_KEY environment variable not set.")
-        print("Please set the variable, e.g., 'export XAI_API_KEY=\"your_api_key\"'")
+        print("Error: XAI_API_KEY environment variable not set.", level="quiet")
+        print("Please set the variable, e.g., 'export XAI_API_KEY=\"your_api_key\"'", level="quiet")
         sys.exit(1)
     return api_key
 
@@ -251,10 +351,10 @@ def read_file_content(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
     except FileNotFoundError:
-        print(f"Error: File not found at '{filepath}'")
+        print(f"Error: File not found at '{filepath}'", level="quiet")
         sys.exit(1)
     except Exception as e:
-        print(f"Error reading file '{filepath}': {e}")
+        print(f"Error reading file '{filepath}': {e}", level="quiet")
         sys.exit(1)
 
 def build_request_payload(system_prompt, question_prompt, other_prompts=None):
@@ -286,28 +386,72 @@ def build_request_payload(system_prompt, question_prompt, other_prompts=None):
 
     return payload
 
-def send_api_request(api_key, payload):
+def send_api_request(api_key, payload, phase=None, body=None):
     """
     Sends the request to the Gemini API and returns the response.
+    phase labels the call in the run store (e.g. "verify"); body is the
+    payload already serialized by the caller, so it is dumped only once.
     """
+    _current_phase.name = phase
+    if _response_cache is not None:
+        cache_key, cached = _response_cache.lookup(payload)
+        if cached is not None:
+            if _events is not None:
+                _events.call(phase, "cache", payload, body, response=cached)
+            return cached
+
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {api_key}"
     }
     
     try:
-        response = requests.post(API_URL, headers=headers, data=json.dumps(payload), timeout=3600)
+        response = None
+        if body is None:
+            body = json.dumps(payload)
+        started = time.time()
+        response = _cancel_token.run(lambda: requests.post(API_URL, headers=headers, data=body, timeout=3600))
         response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
+        response_data = response.json()
+        _cancel_token.record_call(time.time() - started, count_output_tokens(response_data))
+        if _run_store is not None:
+            _run_store.record_call(phase, started, time.time() - started, len(body), len(response.content),
+                                   count_output_tokens(response_data))
+        if _events is not None:
+            _events.call(phase, "api", payload, body, response_data, len(response.content), time.time() - started,
+                         count_output_tokens(response_data))
+        if _response_cache is not None:
+            _response_cache.store(cache_key, response_data)
         print(">>>>>>> Response:")
-        print(json.dumps(response.json(), indent=4))
-        return response.json()
+        log_body(response_data, phase)
+        return response_data
     except requests.exceptions.RequestException as e:
-        print(f"Error during API request: {e}")
-        if response.status_code == 400:
-            print(f"Possible reason for 400: Model '{MODEL_NAME}' might not be available or URL is incorrect for your setup.")
-            print(f"Raw API Response (if available): {response.text}")
+        print(f"Error during API request: {e}", level="quiet")
+        if _run_store is not None:
+            _run_store.record_call(phase, started, time.time() - started, len(body),
+                                   len(response.content) if response is not None else None, error=str(e))
+        if _events is not None:
+            _events.call(phase, "api", payload, body, None, len(response.content) if response is not None else None,
+                         time.time() - started, error=str(e))
+        if response is not None and response.status_code == 400:
+            print(f"Possible reason for 400: Model '{MODEL_NAME}' might not be available or URL is incorrect for your setup.", level="quiet")
+            print(f"Raw API Response (if available): {response.text}", level="quiet")
 
         raise e
+
+def count_output_tokens(response_data):
+    """
+    Returns the number of generated (output and thinking) tokens reported in
+    the API response, or 0 if the response has no usage information.
+    """
+    return response_data.get('usage', {}).get('completion_tokens', 0)
+
+def build_mock_response(text):
+    """
+    Builds an API response carrying the given text, served by --replay-miss mock.
+    """
+    return {"choices": [{"message": {"content": text}}]}
+
 def extract_text_from_response(response_data):
     """
     Extracts the generated tex##t from the API response JSON.
@@ -316,10 +460,10 @@ def extract_text_from_response(response_data):
     try:
         return response_data['choices'][0]['message']['content']
     except (KeyError, IndexError, TypeError) as e:
-        print("Error: Could not extract text from the API response.")
-        print(f"Reason: {e}")
-        print("Full API Response:")
-        print(json.dumps(response_data, indent=2))
+        print("Error: Could not extract text from the API response.", level="quiet")
+        print(f"Reason: {e}", level="quiet")
+        print("Full API Response:", level="quiet")
+        print(json.dumps(response_data, indent=2), level="quiet")
         #sys.exit(1)
         raise e 
 
@@ -375,21 +519,22 @@ def verify_solution(problem_statement, solution, verbose=True):
         question_prompt=newst
         )
     
+    p2_body = json.dumps(p2)
     if(verbose):
         print(">>>>>>> Verification prompt:")
-        print(json.dumps(p2, indent=4))
+        log_body(p2, "verify", p2_body)
 
-    res = send_api_request(get_api_key(), p2)
+    res = send_api_request(get_api_key(), p2, phase="verify", body=p2_body)
     out = extract_text_from_response(res) 
 
     if(verbose):
         print(">>>>>>> Verification results:")
-        print(json.dumps(out, indent=4))
+        log_text(out, "verify")
 
     check_correctness = """Response in "yes" or "no". Is the following statement saying the solution is complete, correct, and does not contain critical error or a major justification gap?""" \
             + "\n\n" + out 
     prompt = build_request_payload(system_prompt="", question_prompt=check_correctness)
-    r = send_api_request(get_api_key(), prompt)
+    r = send_api_request(get_api_key(), prompt, phase="verdict")
     o = extract_text_from_response(r) 
 
     if(verbose):
@@ -404,7 +549,16 @@ def verify_solution(problem_statement, solution, verbose=True):
 
     if(verbose):
         print(">>>>>>>Bug report:")
-        print(json.dumps(bug_report, indent=4))
+        log_text(bug_report, "verify")
+
+    if _run_store is not None:
+        _run_store.record_verdict(solution, o, bug_report)
+    if _events is not None:
+        critical, gaps = count_findings(bug_report)
+        _events.emit("verdict", solution_hash=text_hash(solution), passed="yes" in o.lower(),
+                     critical_errors=critical, justification_gaps=gaps)
+    if _artifacts is not None:
+        _artifacts.add_verdict(_artifacts.put(solution, problem_statement), o, bug_report)
     
     return bug_report, o
 
@@ -421,7 +575,7 @@ Response in exactly "yes" or "no". No other words.
     """
 
     p1 = build_request_payload(system_prompt="",    question_prompt=check_complete_prompt)
-    r = send_api_request(get_api_key(), p1)
+    r = send_api_request(get_api_key(), p1, phase="check_complete")
     o = extract_text_from_response(r)
 
     print(o)
@@ -438,13 +592,14 @@ def init_explorations(problem_statement, verbose=True, other_prompts=[]):
         )
 
     print(f">>>>>> Initial prompt.")
-    print(json.dumps(p1, indent=4))
+    p1_body = json.dumps(p1)
+    log_body(p1, "explore", p1_body)
 
-    response1 = send_api_request(get_api_key(), p1)
+    response1 = send_api_request(get_api_key(), p1, phase="explore", body=p1_body)
     output1 = extract_text_from_response(response1)
 
     print(f">>>>>>> First solution: ") 
-    print(json.dumps(output1, indent=4))
+    log_text(output1, "explore")
 
     print(f">>>>>>> Self improvement start:")
     p1["messages"].append(
@@ -458,10 +613,10 @@ def init_explorations(problem_statement, verbose=True, other_prompts=[]):
         }
     )
 
-    response2 = send_api_request(get_api_key(), p1)
+    response2 = send_api_request(get_api_key(), p1, phase="improve")
     solution = extract_solution(extract_text_from_response(response2))
     print(f">>>>>>> Corrected solution: ")
-    print(json.dumps(solution, indent=4))
+    log_text(solution, "improve")
     
     #print(f">>>>>>> Check if solution is complete:"  )
     #is_complete = check_if_solution_claimed_complete(output1)
@@ -473,12 +628,21 @@ def init_explorations(problem_statement, verbose=True, other_prompts=[]):
     verify, good_verify = verify_solution(problem_statement, solution, verbose)
 
     print(f">>>>>>> Initial verification: ")
-    print(json.dumps(verify, indent=4))
+    log_text(verify, "verify")
     print(f">>>>>>> verify results: {good_verify}")
     
     return p1, solution, verify, good_verify
 
-def agent(problem_statement, other_prompts=[], memory_file=None, resume_from_memory=False):
+def agent(problem_statement, other_prompts=[], memory_file=None, resume_from_memory=False, warm_start=None):
+    """
+    Solves the problem with the explore/verify/correct loop. warm_start is a
+    stored candidate (see ArtifactStore.candidates) to start the correction
+    loop from instead of generating an initial solution.
+    """
+    # Loop state, restored from the memory file when resuming
+    good_verify = None
+    correct_count = 1
+    error_count = 0
     if resume_from_memory and memory_file:
         # Load memory and resume from previous state
         memory = load_memory(memory_file)
@@ -488,7 +652,13 @@ def agent(problem_statement, other_prompts=[], memory_file=None, resume_from_mem
             current_iteration = memory.get("current_iteration", 0)
             solution = memory.get("solution", None)
             verify = memory.get("verify", None)
-            print(f"Resuming from iteration {current_iteration}")
+            if solution is not None and "good_verify" in memory:
+                # The checkpoint holds the full loop state: continue with the next iteration
+                good_verify = memory["good_verify"]
+                correct_count = memory["correct_count"]
+                error_count = memory["error_count"]
+                current_iteration += 1
+            print(f"Resuming from iteration {current_iteration}, number of corrects: {correct_count}, number of errors: {error_count}")
         else:
             print("Failed to load memory, starting fresh")
             current_iteration = 0
@@ -501,19 +671,29 @@ def agent(problem_statement, other_prompts=[], memory_file=None, resume_from_mem
         verify = None
     
     if solution is None:
-        p1, solution, verify, good_verify = init_explorations(problem_statement, True, other_prompts)
-        if(solution is None):
-            print(">>>>>>> Failed in finding a complete solution.")
-            return None
-    else:
-        # We have a solution from memory, need to get good_verify
+        if warm_start is not None:
+            # Reuse the stored solution and its latest verdict: no generation or verification calls
+            print(f">>>>>>> Warm start from stored solution {warm_start['hash'][:16]} (verdict: {warm_start['good_verify']}).")
+            solution, verify, good_verify = warm_start["solution"], warm_start["verify"], warm_start["good_verify"]
+        else:
+            p1, solution, verify, good_verify = init_explorations(problem_statement, True, other_prompts)
+            if(solution is None):
+                print(">>>>>>> Failed in finding a complete solution.", level="quiet")
+                return None
+        # Checkpoint the initial solution so a resume does not redo it
+        if memory_file:
+            save_memory(memory_file, problem_statement, other_prompts, -1, 30, solution, verify, good_verify, 1, 0)
+    elif good_verify is None:
+        # Memory file written by an older version: the verdict has to be recomputed
         _, good_verify = verify_solution(problem_statement, solution)
 
-    error_count = 0
-    correct_count = 1
     success = False
     for i in range(current_iteration, 30):
         try:
+            log_index("iteration", iteration=i)
+            if _events is not None:
+                _events.set_local(iteration=i)
+                _events.emit("iteration", correct_count=correct_count, error_count=error_count)
             print(f"Number of iterations: {i}, number of corrects: {correct_count}, number of errors: {error_count}")
 
             if("yes" not in good_verify.lower()):
@@ -545,12 +725,13 @@ def agent(problem_statement, other_prompts=[], memory_file=None, resume_from_mem
                 )
 
                 print(">>>>>>> New prompt:")
-                print(json.dumps(p1, indent=4))
-                response2 = send_api_request(get_api_key(), p1)
+                p1_body = json.dumps(p1)
+                log_body(p1, "correct", p1_body)
+                response2 = send_api_request(get_api_key(), p1, phase="correct", body=p1_body)
                 solution = extract_solution(extract_text_from_response(response2))
 
                 print(">>>>>>> Corrected solution:")
-                print(json.dumps(solution, indent=4))
+                log_text(solution, "correct")
 
 
             print(f">>>>>>> Verify the solution.")
@@ -562,31 +743,37 @@ def agent(problem_statement, other_prompts=[], memory_file=None, resume_from_mem
                 error_count = 0
     
 
+            if _run_store is not None:
+                _run_store.record_iteration(i, correct_count, error_count, good_verify, solution)
+
             # Save memory every iteration
             if memory_file:
-                save_memory(memory_file, problem_statement, other_prompts, i, 30, solution, verify)
+                save_memory(memory_file, problem_statement, other_prompts, i, 30, solution, verify,
+                            good_verify, correct_count, error_count)
             
             if(correct_count >= 5):
                 print(">>>>>>> Correct solution found.")
-                print(json.dumps(solution, indent=4))
+                log_text(solution)
                 return solution
 
             elif(error_count >= 10):
-                print(">>>>>>> Failed in finding a correct solution.")
+                print(">>>>>>> Failed in finding a correct solution.", level="quiet")
                 # Save final state before returning
                 if memory_file:
-                    save_memory(memory_file, problem_statement, other_prompts, i, 30, solution, verify)
+                    save_memory(memory_file, problem_statement, other_prompts, i, 30, solution, verify,
+                                good_verify, correct_count, error_count)
                 return None
         
         except Exception as e:
-            print(f">>>>>>> Error in run {i}: {e}")
+            print(f">>>>>>> Error in run {i}: {e}", level="quiet")
             continue
 
     if(not success):
-        print(">>>>>>> Failed in finding a correct solution.")
+        print(">>>>>>> Failed in finding a correct solution.", level="quiet")
         # Save final state before returning
         if memory_file:
-            save_memory(memory_file, problem_statement, other_prompts, 30, 30, solution, verify)
+            save_memory(memory_file, problem_statement, other_prompts, 30, 30, solution, verify,
+                        good_verify, correct_count, error_count)
         return None
         
 if __name__ == "__main__":
@@ -595,15 +782,49 @@ if __name__ == "__main__":
     parser.add_argument('problem_file', nargs='?', default='problem_statement.txt', 
                        help='Path to the problem statement file (default: problem_statement.txt)')
     parser.add_argument('--log', '-l', type=str, help='Path to log file (optional)')
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default='debug',
+                       help='How much is logged: quiet, summary, debug (default) or trace (full payloads and responses)')
+    parser.add_argument('--log-phases', type=str,
+                       help=f'Comma-separated phases whose solutions, prompts and verification logs are logged '
+                            f'(default: all of {", ".join(PHASES)})')
+    parser.add_argument('--log-flush', choices=FLUSH_MODES, default='interval',
+                       help='When log lines are flushed to disk (default: interval, every second)')
+    parser.add_argument('--log-max-bytes', type=parse_size, default=None,
+                       help='Cap the log file at about this size (e.g. 200M), keeping its head, its tail and the '
+                            'final solution (default: no cap)')
     parser.add_argument('--other_prompts', '-o', type=str, help='Other prompts (optional)')
     parser.add_argument("--max_runs", '-m', type=int, default=10, help='Maximum number of runs (default: 10)')
+    parser.add_argument('--cancel-file', type=str, help='Stop gracefully as soon as this file exists (optional)')
+    parser.add_argument('--record', type=str, help='Record every API response into this store (optional)')
+    parser.add_argument('--replay', type=str, help='Serve API responses from this store instead of the API (optional)')
+    parser.add_argument('--replay-miss', choices=MISS_POLICIES, default='fail',
+                       help='What to do with requests missing from the replay store (default: fail)')
+    parser.add_argument('--cache-session', type=str, default=None,
+                       help='Session of the responses recorded or replayed, telling apart the agents sharing a store '
+                            '(default: the name of the log file)')
+    parser.add_argument('--store', type=str, help='SQLite database recording runs, calls, solutions and verdicts (optional)')
+    parser.add_argument('--artifacts', type=str, help='Directory of the solution artifact store shared across runs (optional)')
+    parser.add_argument('--events', type=str,
+                       help='Write a structured JSONL event log (runs, iterations, calls, verdicts) to this file (optional)')
+    parser.add_argument('--log-bodies', action='store_true',
+                       help='Log full request payloads and raw responses instead of their size and hash')
+    parser.add_argument('--intern-blobs', action='store_true',
+                       help='Like --log-bodies, but write prompts and other long texts once to <log>.blobs.jsonl '
+                            'and reference them by hash (expand with blobs.py)')
+    parser.add_argument('--warm-start', action='store_true',
+                       help='Start from the best solution stored for this problem in --artifacts instead of generating one')
+    parser.add_argument('--warm-start-rank', type=int, default=0,
+                       help='Start from the N-th best stored solution instead (wraps around; default: 0)')
     parser.add_argument('--memory', '-mem', type=str, help='Path to memory file for saving/loading state (optional)')
     parser.add_argument('--resume', '-r', action='store_true', help='Resume from memory file if provided')
+    parser.add_argument('--memory-fsync', choices=['always', 'interval', 'never'], default='interval',
+                       help='When memory checkpoints are synced to disk (default: interval)')
     
     args = parser.parse_args()
 
     max_runs = args.max_runs
     memory_file = args.memory
+    _memory_fsync = args.memory_fsync
     resume_from_memory = args.resume
     
     other_prompts = []
@@ -618,25 +839,120 @@ if __name__ == "__main__":
         if resume_from_memory:
             print("Resume mode: Will attempt to load from memory file")
 
+    try:
+        _log_filter = LogFilter(args.log_level, args.log_phases.split(',') if args.log_phases else None)
+    except ValueError as e:
+        print(e, level="quiet")
+        sys.exit(1)
+
     # Set up logging if log file is specified
     if args.log:
-        if not set_log_file(args.log):
+        if not set_log_file(args.log, append=resume_from_memory, flush=args.log_flush, max_bytes=args.log_max_bytes):
             sys.exit(1)
         print(f"Logging to file: {args.log}")
     
     problem_statement = read_file_content(args.problem_file)
 
+    if args.replay or args.record:
+        _response_cache = ResponseCache(args.replay or args.record, "replay" if args.replay else "record",
+                                        args.replay_miss, API_URL, build_mock_response,
+                                        args.cache_session if args.cache_session is not None else session_of(args.log))
+        print(f"{'Replaying' if args.replay else 'Recording'} API responses: {args.replay or args.record}")
+
+    if args.store:
+        _run_store = RunStore(args.store, os.path.basename(__file__), MODEL_NAME, args.log)
+        print(f"Recording runs to store: {args.store}")
+
+    if args.artifacts:
+        _artifacts = ArtifactStore(args.artifacts, MODEL_NAME, args.log)
+        print(f"Storing solutions in: {args.artifacts}")
+
+    _log_bodies = args.log_bodies or args.intern_blobs or args.log_level == "trace"
+    if args.intern_blobs and (args.log or args.events):
+        _blobs = BlobStore(blob_path(args.log or args.events))
+        for text in (step1_prompt, self_improvement_prompt, correction_prompt, verification_system_prompt,
+                     verification_remider, problem_statement):
+            _blobs.register(text)
+        print(f"Interning logged texts in: {_blobs.path}")
+    if args.events:
+        _events = EventLog(args.events, _log_bodies, _blobs, agent=os.path.basename(__file__), model=MODEL_NAME)
+        print(f"Writing events to: {args.events}")
+
+    warm_start = None
+    if args.warm_start:
+        if _artifacts is None:
+            print("--warm-start requires --artifacts")
+            sys.exit(1)
+        candidates = _artifacts.candidates(problem_statement)
+        if candidates:
+            warm_start = candidates[args.warm_start_rank % len(candidates)]
+            print(f"Warm start: {len(candidates)} stored solution(s), using {warm_start['hash'][:16]} "
+                  f"({warm_start['passed']}/{warm_start['verdicts']} verdicts passed)")
+        else:
+            print("Warm start: no stored solution with a verdict for this problem, starting fresh")
+
+    # Stop in-flight requests and exit cleanly on SIGTERM/SIGINT or the cancel file
+    _cancel_token.cancel_file = args.cancel_file
+    _cancel_token.install_signal_handlers()
+
     for i in range(max_runs):
-        print(f"\n\n>>>>>>>>>>>>>>>>>>>>>>>>>> Run {i} of {max_runs} ...")
+        log_index("run", run=i)
+        print(f"\n\n>>>>>>>>>>>>>>>>>>>>>>>>>> Run {i} of {max_runs} ...", level="quiet")
+        # Only the first run resumes; later runs start over as usual
+        resume = resume_from_memory and i == 0
+        if _run_store is not None:
+            _run_store.start_run(problem_statement, i)
+        if _events is not None:
+            _events.set(run=i)
+            _events.set_local(iteration=None)
+            _events.emit("run_start", resume=resume)
         try:
-            sol = agent(problem_statement, other_prompts, memory_file, resume_from_memory)
+            sol = agent(problem_statement, other_prompts, memory_file, resume, warm_start if i == 0 else None)
+            if _run_store is not None:
+                _run_store.end_run("solved" if sol is not None else "failed", sol is not None)
+            if _events is not None:
+                _events.emit("run_end", status="solved" if sol is not None else "failed")
             if(sol is not None):
-                print(f">>>>>>> Found a correct solution in run {i}.")
-                print(json.dumps(sol, indent=4))
+                print(f">>>>>>> Found a correct solution in run {i}.", level="quiet")
+                log_index("solution", run=i)
+                if _events is not None:
+                    _events.emit("solution", solution_hash=text_hash(sol))
+                print(json.dumps(sol, indent=4), level="quiet")
+                if _artifacts is not None:
+                    solution_hash = _artifacts.put(sol, problem_statement)
+                    _artifacts.mark_accepted(solution_hash)
+                    print(f">>>>>>> Solution artifact: {solution_hash}", level="quiet")
                 break
+        except CancelledError:
+            print(f">>>>>>> Cancelled in run {i}: {_cancel_token.reason}.", level="quiet")
+            print(_cancel_token.summary(), level="quiet")
+            if _run_store is not None:
+                _run_store.end_run("cancelled")
+            if _events is not None:
+                _events.emit("run_end", status="cancelled")
+            # The last checkpoint must be on disk before exiting, to be resumed from
+            close_memory()
+            close_log_file()
+            sys.exit(EXIT_CANCELLED)
+        except ReplayMissError as e:
+            print(f">>>>>>> Replay miss in run {i}: {e}", level="quiet")
+            if _run_store is not None:
+                _run_store.end_run("error")
+            if _events is not None:
+                _events.emit("run_end", status="error")
+            close_memory()
+            close_log_file()
+            sys.exit(1)
         except Exception as e:
-            print(f">>>>>>> Error in run {i}: {e}")
+            print(f">>>>>>> Error in run {i}: {e}", level="quiet")
+            if _run_store is not None:
+                _run_store.end_run("error")
+            if _events is not None:
+                _events.emit("run_end", status="error")
             continue
     
+    if _response_cache is not None:
+        print(_response_cache.summary(), level="quiet")
+
     # Close log file if it was opened
     close_log_file()
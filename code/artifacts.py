@@ -0,0 +1,269 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Content-addressed store of candidate solutions, shared by agents and runs.
+
+Every solution is stored once under the SHA-256 of its text, whichever agent
+or run produced it, with its metadata and an append-only verdict history:
+
+    objects/ab/<hash>.txt             solution text (written once)
+    objects/ab/<hash>.json            metadata of the first writer (problem, model, source)
+    objects/ab/<hash>.history.jsonl   one line per verdict, plus "accepted" events
+    problems/<problem hash>/<hash>    empty marker: solution attempted for the problem
+
+Files are created with an atomic link and history lines with a single
+O_APPEND write, so concurrent agents (also on other hosts sharing the
+directory) never see partial objects.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+def text_hash(text):
+    """SHA-256 of a text (None hashes as the empty text), the key of stored solutions."""
+    return hashlib.sha256((text or "").encode('utf-8')).hexdigest()
+
+def _write_once(path, data):
+    """Create path with data unless it exists. Returns True if it was created."""
+    if os.path.exists(path):
+        return False
+    # A unique temporary file: threads of one process may write the same object
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.fchmod(fd, 0o644)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(data)
+    try:
+        os.link(tmp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp_path)
+
+def count_findings(bug_report):
+    """
+    Counts the critical errors and justification gaps listed in a bug report.
+    Returns a tuple (critical_errors, justification_gaps).
+    """
+    text = (bug_report or "").lower()
+    return text.count("critical error"), text.count("justification gap")
+
+class ArtifactStore:
+    def __init__(self, root, model=None, source=None):
+        self.root = root
+        self.model = model
+        self.source = source
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "problems"), exist_ok=True)
+
+    def _object_path(self, h, ext):
+        return os.path.join(self.root, "objects", h[:2], f"{h}.{ext}")
+
+    def _problem_dir(self, problem_statement):
+        return os.path.join(self.root, "problems", text_hash(problem_statement.strip()))
+
+    def put(self, text, problem_statement=None):
+        """Store a solution (once) and link it to its problem. Returns its hash."""
+        h = text_hash(text)
+        text_path = self._object_path(h, "txt")
+        if not os.path.exists(text_path):
+            os.makedirs(os.path.dirname(text_path), exist_ok=True)
+            _write_once(text_path, text)
+            _write_once(self._object_path(h, "json"), json.dumps({
+                "hash": h,
+                "problem_hash": text_hash(problem_statement.strip()) if problem_statement else None,
+                "model": self.model,
+                "source": self.source,
+                "length": len(text),
+                "created": time.time(),
+            }, indent=2))
+        if problem_statement:
+            problem_dir = self._problem_dir(problem_statement)
+            marker = os.path.join(problem_dir, h)
+            if not os.path.exists(marker):
+                os.makedirs(problem_dir, exist_ok=True)
+                _write_once(os.path.join(problem_dir, "problem.txt"), problem_statement)
+                _write_once(marker, "")
+        return h
+
+    def _append_history(self, h, event):
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        fd = os.open(self._object_path(h, "history.jsonl"), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line.encode('utf-8'))
+        finally:
+            os.close(fd)
+
+    def add_verdict(self, h, verdict, bug_report):
+        """Append a verification verdict (yes/no plus the findings) to the history of h."""
+        critical, gaps = count_findings(bug_report)
+        self._append_history(h, {
+            "event": "verdict",
+            "passed": "yes" in verdict.lower(),
+            "critical_errors": critical,
+            "justification_gaps": gaps,
+            "bug_report": bug_report,
+            "model": self.model,
+            "source": self.source,
+            "time": time.time(),
+        })
+
+    def mark_accepted(self, h):
+        """Record that an agent accepted h as its final solution."""
+        self._append_history(h, {"event": "accepted", "model": self.model, "source": self.source, "time": time.time()})
+
+    def __contains__(self, h):
+        return os.path.exists(self._object_path(h, "txt"))
+
+    def get(self, h):
+        """Solution text of h, or None."""
+        try:
+            with open(self._object_path(h, "txt"), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def metadata(self, h):
+        try:
+            with open(self._object_path(h, "json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def history(self, h):
+        """Verdict history of h, oldest first (a torn last line is skipped)."""
+        events = []
+        try:
+            with open(self._object_path(h, "history.jsonl"), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        pass
+        except FileNotFoundError:
+            pass
+        return events
+
+    def solutions_for(self, problem_statement):
+        """Hashes of all solutions stored for a problem."""
+        try:
+            names = os.listdir(self._problem_dir(problem_statement))
+        except FileNotFoundError:
+            return []
+        return [name for name in names if len(name) == 64]
+
+    def accepted(self, problem_statement):
+        """Hashes of the solutions of a problem that an agent accepted."""
+        return [h for h in self.solutions_for(problem_statement)
+                if any(e.get("event") == "accepted" for e in self.history(h))]
+
+    def candidates(self, problem_statement):
+        """
+        Stored solutions of a problem that have a verdict, best first (see
+        candidate_rank), as dicts with the solution text and its latest
+        verdict: the bug report ("verify") and "yes"/"no" ("good_verify").
+        """
+        result = []
+        for h in self.solutions_for(problem_statement):
+            verdicts = [e for e in self.history(h) if e.get("event") == "verdict"]
+            if not verdicts:
+                continue
+            text = self.get(h)
+            if not text:
+                continue
+            last = verdicts[-1]
+            result.append({
+                "hash": h,
+                "solution": text,
+                "verify": last["bug_report"],
+                "good_verify": "yes" if last["passed"] else "no",
+                "critical_errors": last["critical_errors"],
+                "justification_gaps": last["justification_gaps"],
+                "passed": sum(1 for e in verdicts if e["passed"]),
+                "verdicts": len(verdicts),
+            })
+        result.sort(key=candidate_rank)
+        return result
+
+def candidate_rank(c):
+    """
+    Sort key for stored candidates: latest verdict passing first, then fewest
+    critical errors and justification gaps, then the best pass rate.
+    """
+    return (0 if c["good_verify"] == "yes" else 1, c["critical_errors"], c["justification_gaps"],
+            -c["passed"] / c["verdicts"])
+
+def summarize(store, h):
+    verdicts = [e for e in store.history(h) if e.get("event") == "verdict"]
+    passed = sum(1 for e in verdicts if e["passed"])
+    accepted = any(e.get("event") == "accepted" for e in store.history(h))
+    meta = store.metadata(h) or {}
+    return f"{h[:16]}  {passed}/{len(verdicts)} passed  {'accepted  ' if accepted else ''}{meta.get('model')}  {meta.get('source')}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Inspect a solution artifact store')
+    parser.add_argument('root', help='Artifact store directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+    lst = sub.add_parser('list', help='List the solutions stored for a problem')
+    lst.add_argument('problem_file', help='Path to the problem statement file')
+    lst.add_argument('--accepted', action='store_true', help='Only list accepted solutions')
+    show = sub.add_parser('show', help='Print a solution and its verdict history')
+    show.add_argument('hash', help='Solution hash (or a unique prefix of at least 8 characters)')
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.root)
+    if args.command == 'list':
+        with open(args.problem_file, 'r', encoding='utf-8') as f:
+            problem_statement = f.read()
+        hashes = store.accepted(problem_statement) if args.accepted else store.solutions_for(problem_statement)
+        for h in sorted(hashes):
+            print(summarize(store, h))
+        print(f"{len(hashes)} solution(s)")
+    else:
+        h = args.hash
+        if h not in store and len(h) >= 8:
+            bucket = os.path.join(args.root, "objects", h[:2])
+            matches = sorted({name.split('.')[0] for name in (os.listdir(bucket) if os.path.isdir(bucket) else [])
+                              if name.startswith(h)})
+            if len(matches) == 1:
+                h = matches[0]
+        text = store.get(h)
+        if text is None:
+            print(f"No solution {args.hash} in {args.root}")
+            sys.exit(1)
+        print(summarize(store, h))
+        for e in store.history(h):
+            if e.get("event") == "verdict":
+                print(f"  {'yes' if e['passed'] else 'no '}  critical errors: {e['critical_errors']}, "
+                      f"justification gaps: {e['justification_gaps']}  ({e.get('source')})")
+            else:
+                print(f"  {e.get('event')}  ({e.get('source')})")
+        print("=" * 50)
+        print(text)
@@ -0,0 +1,173 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Interning of large text blobs in logs (--intern-blobs).
+
+The prompts, the problem statement and every long text of a logged payload
+or response are written once to a blob file, one JSON line each:
+
+    {"hash": "3f9a0c55e2b14d7e", "text": "..."}
+
+and replaced in the log by a reference <<blob:3f9a0c55e2b14d7e>>. A text
+that contains known blobs (e.g. a verification prompt holding the problem
+statement and the solution) is stored with references to them, so each
+prompt is written once however often it is sent.
+
+Running this file expands a text or event log back to its full form:
+
+    python blobs.py logs/agent_00.log > agent_00.full.log
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import threading
+
+from compress import SUFFIXES, compression_of, open_text, read_text, resolve
+
+TOKEN = re.compile(r'<<blob:([0-9a-f]{16})>>')
+
+def blob_path(log_file):
+    """LOG.blobs.jsonl, shared by LOG and its compressed variants."""
+    compression = compression_of(log_file)
+    if compression != "none":
+        log_file = log_file[:-len(SUFFIXES[compression])]
+    return log_file + ".blobs.jsonl"
+
+def token(h):
+    return f"<<blob:{h}>>"
+
+class BlobStore:
+    def __init__(self, path, min_size=256):
+        self.path = path
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        # Full text -> hash, for every blob of the file (also those of a resumed run)
+        self._known = {}
+        blobs = load_blobs(path)
+        for h in blobs:
+            self._known[expand_blob(blobs, h)] = h
+        self._file = open_text(path, 'a')
+
+    def _add(self, text, stored):
+        h = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        if text not in self._known:
+            self._known[text] = h
+            self._file.write(json.dumps({"hash": h, "text": stored}, ensure_ascii=False) + '\n')
+            self._file.flush()
+        return h
+
+    def register(self, text):
+        """Store a text that is likely to be repeated (a prompt, the problem statement)."""
+        if len(text) >= self.min_size:
+            with self._lock:
+                self._add(text, text)
+
+    def _intern_text(self, text):
+        if len(text) < self.min_size:
+            return text
+        h = self._known.get(text)
+        if h is not None:
+            return token(h)
+        stored = text
+        for blob, blob_hash in sorted(self._known.items(), key=lambda item: -len(item[0])):
+            if len(blob) <= len(stored) and blob in stored:
+                stored = stored.replace(blob, token(blob_hash))
+        return token(self._add(text, stored))
+
+    def intern(self, data):
+        """Copy of a JSON value with its long strings replaced by blob references."""
+        with self._lock:
+            return self._intern(data)
+
+    def _intern(self, data):
+        if isinstance(data, str):
+            return self._intern_text(data)
+        if isinstance(data, dict):
+            return {key: self._intern(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self._intern(value) for value in data]
+        return data
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def load_blobs(path):
+    """Hash -> stored text of a blob file (a torn last line is skipped)."""
+    blobs = {}
+    try:
+        content = read_text(resolve(path))
+    except FileNotFoundError:
+        return blobs
+    for line in content.splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        blobs[entry["hash"]] = entry["text"]
+    return blobs
+
+def expand_blob(blobs, h, cache=None):
+    """Full text of blob h, with the references it contains expanded."""
+    if cache is not None and h in cache:
+        return cache[h]
+    text = TOKEN.sub(lambda m: expand_blob(blobs, m.group(1), cache) if m.group(1) in blobs else m.group(0),
+                     blobs[h])
+    if cache is not None:
+        cache[h] = text
+    return text
+
+def expand(text, blobs):
+    """
+    Expand the references in a log. References only occur inside JSON
+    strings, so each is replaced by the JSON-escaped blob text.
+    """
+    cache = {}
+    def replace(m):
+        if m.group(1) not in blobs:
+            return m.group(0)
+        return json.dumps(expand_blob(blobs, m.group(1), cache))[1:-1]
+    return TOKEN.sub(replace, text)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Expand the blob references of a text or event log')
+    parser.add_argument('log_file', help='Log or event log written with --intern-blobs')
+    parser.add_argument('--blobs', type=str, help='Blob file (default: <log_file>.blobs.jsonl)')
+    parser.add_argument('--output', '-o', type=str, help='Write the expanded log here instead of stdout')
+    args = parser.parse_args()
+
+    blobs = load_blobs(args.blobs or blob_path(args.log_file))
+    if not blobs:
+        print(f"No blobs found in {args.blobs or blob_path(args.log_file)}", file=sys.stderr)
+        sys.exit(1)
+    expanded = expand(read_text(args.log_file), blobs)
+    if args.output:
+        with open_text(args.output, 'w') as f:
+            f.write(expanded)
+    else:
+        sys.stdout.write(expanded)
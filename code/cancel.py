@@ -0,0 +1,154 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Cooperative cancellation shared by the agents.
+
+An agent owns one CancelToken. It is cancelled by SIGTERM/SIGINT or by the
+appearance of a cancel file (written by run_parallel.py when a solution is
+found). API calls are run through CancelToken.run(), which stops waiting for
+the in-flight request as soon as the token is cancelled and raises
+CancelledError so the agent can save its state and exit. The request itself
+is not aborted: it is abandoned in its daemon thread until the process exits.
+"""
+
+import os
+import signal
+import threading
+import time
+
+# Exit code used by agents that stop because they were cancelled (128 + SIGTERM)
+EXIT_CANCELLED = 143
+
+class CancelledError(BaseException):
+    """
+    Raised when an agent is cancelled. Derives from BaseException so that the
+    agents' generic 'except Exception: retry' handlers do not swallow it.
+    """
+
+class CancelToken:
+    def __init__(self, cancel_file=None, poll_interval=0.5):
+        self.cancel_file = cancel_file
+        self.poll_interval = poll_interval
+        self.reason = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._last_poll = 0.0
+        self._in_flight = {}
+        self._next_call = 0
+        self._calls = 0
+        self._call_seconds = 0.0
+        self._output_tokens = 0
+
+    def cancel(self, reason="cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.cancel_file:
+            now = time.time()
+            if now - self._last_poll >= self.poll_interval:
+                self._last_poll = now
+                if os.path.exists(self.cancel_file):
+                    self.cancel(f"cancel file {self.cancel_file}")
+        return self._event.is_set()
+
+    def check(self):
+        """Raise CancelledError if the token has been cancelled."""
+        if self.cancelled():
+            raise CancelledError(self.reason)
+
+    def install_signal_handlers(self):
+        """Cancel on the first SIGTERM/SIGINT; a second SIGINT interrupts as usual."""
+        def handler(signum, frame):
+            if self._event.is_set() and signum == signal.SIGINT:
+                raise KeyboardInterrupt
+            self.cancel(f"signal {signal.Signals(signum).name}")
+        signal.signal(signal.SIGTERM, handler)
+        signal.signal(signal.SIGINT, handler)
+
+    def record_call(self, seconds, output_tokens):
+        """Record a completed API call, used to estimate what cancelling saves."""
+        with self._lock:
+            self._calls += 1
+            self._call_seconds += seconds
+            self._output_tokens += output_tokens or 0
+
+    def summary(self):
+        """
+        Describe the effect of cancelling: the number of abandoned in-flight
+        requests and an estimate of the output tokens they would still have
+        generated, based on the average completed call of this agent.
+        """
+        now = time.time()
+        with self._lock:
+            in_flight = list(self._in_flight.values())
+            calls, seconds, tokens = self._calls, self._call_seconds, self._output_tokens
+        if not calls:
+            return f"Abandoned {len(in_flight)} in-flight request(s); estimated output tokens saved: unknown (no completed calls)"
+        avg_seconds = seconds / calls
+        avg_tokens = tokens / calls
+        saved = 0
+        for started in in_flight:
+            remaining = max(0.0, 1.0 - (now - started) / avg_seconds) if avg_seconds > 0 else 0.0
+            saved += int(avg_tokens * remaining)
+        return f"Abandoned {len(in_flight)} in-flight request(s); estimated output tokens saved: {saved}"
+
+    def run(self, fn):
+        """
+        Run fn() (a blocking request) in a daemon thread and wait for it while
+        polling the token. Raises CancelledError as soon as the token is
+        cancelled. The request is not aborted: it is abandoned in its daemon
+        thread, still running until the process exits, which closes its
+        connection so the provider stops generating.
+        """
+        self.check()
+        with self._lock:
+            call_id = self._next_call
+            self._next_call += 1
+            self._in_flight[call_id] = time.time()
+
+        result = {}
+        done = threading.Event()
+
+        def target():
+            try:
+                result['value'] = fn()
+            except BaseException as e:
+                result['error'] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=target, daemon=True).start()
+        # On cancellation the call stays registered as in flight for summary()
+        while not done.wait(self.poll_interval):
+            self.check()
+        with self._lock:
+            self._in_flight.pop(call_id, None)
+        if 'error' in result:
+            raise result['error']
+        return result['value']
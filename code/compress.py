@@ -0,0 +1,214 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Transparent compression for logs, memory files and archived runs.
+
+Files are written compressed when their name ends in .gz (gzip) or .zst
+(zstd, needs the optional 'zstandard' package) and read back by content, so
+readers do not care how a file was written. Writers flush complete blocks,
+and readers tolerate a truncated tail, so a log that is still being written
+(or whose agent was killed) can be read up to its last flushed line.
+
+Usage as a script compresses existing files or directories in place, e.g.
+
+    python compress.py run_logs --zstd
+"""
+
+import argparse
+import gzip
+import io
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# Files picked up when a directory is compressed (not the SQLite stores)
+ARCHIVE_SUFFIXES = (".log", ".mem", ".json", ".jsonl", ".txt", ".md")
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+
+def compression_of(path):
+    """Compression used to write path, from its suffix."""
+    for compression, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return "none"
+
+def add_suffix(path, compression):
+    """Return path with the suffix of compression ("none" or None: unchanged)."""
+    if not compression or compression == "none" or compression_of(path) == compression:
+        return path
+    return path + SUFFIXES[compression]
+
+def detect(path):
+    """Compression of an existing file, from its magic bytes."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(4)
+    except FileNotFoundError:
+        return "none"
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return "none"
+
+def resolve(path):
+    """Return path, or its compressed variant if only that one exists."""
+    if os.path.exists(path):
+        return path
+    for suffix in SUFFIXES.values():
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return path
+
+def open_text(path, mode='r', compression=None):
+    """
+    Open a text file for reading ('r'), writing ('w') or appending ('a').
+    Reads detect the compression from the content; writes use compression,
+    or the suffix of path if it is None. Appending to a compressed file adds
+    a new gzip member / zstd frame, which readers concatenate.
+    """
+    if mode == 'r':
+        compression = detect(path)
+    elif compression is None:
+        compression = compression_of(path)
+
+    if compression == "gzip":
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if compression == "zstd":
+        _require_zstd()
+        if mode == 'r':
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        else:
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, mode + 'b'), closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def _gunzip_tolerant(data):
+    out = []
+    while data:
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            out.append(d.decompress(data))
+        except zlib.error:
+            break
+        if not d.eof:
+            break
+        data = d.unused_data
+    return b''.join(out)
+
+def _unzstd_tolerant(data):
+    _require_zstd()
+    reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True)
+    out = []
+    while True:
+        try:
+            chunk = reader.read(1 << 20)
+        except zstandard.ZstdError:
+            break
+        if not chunk:
+            break
+        out.append(chunk)
+    return b''.join(out)
+
+def read_bytes(path):
+    """Read and decompress a whole file, ignoring a truncated last block."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(GZIP_MAGIC):
+        return _gunzip_tolerant(data)
+    if data.startswith(ZSTD_MAGIC):
+        return _unzstd_tolerant(data)
+    return data
+
+def read_text(path):
+    return read_bytes(path).decode('utf-8', errors='replace')
+
+def compress_file(path, compression, keep=False):
+    """
+    Compress path into path + suffix (atomically) and remove the original
+    unless keep is set. Returns the new path.
+    """
+    target = add_suffix(path, compression)
+    tmp_path = target + ".tmp"
+    with open(path, 'rb') as src:
+        if compression == "gzip":
+            dst = gzip.open(tmp_path, 'wb')
+        else:
+            _require_zstd()
+            dst = zstandard.ZstdCompressor(level=19).stream_writer(open(tmp_path, 'wb'), closefd=True)
+        with dst:
+            while True:
+                chunk = src.read(1 << 20)
+                if not chunk:
+                    break
+                dst.write(chunk)
+    os.replace(tmp_path, target)
+    if not keep:
+        os.remove(path)
+    return target
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compress logs, memory files and archived runs in place')
+    parser.add_argument('paths', nargs='+', help='Files or directories (compressed recursively)')
+    parser.add_argument('--zstd', action='store_true', help='Use zstd instead of gzip (needs the zstandard package)')
+    parser.add_argument('--keep', action='store_true', help='Keep the uncompressed files')
+    args = parser.parse_args()
+
+    compression = "zstd" if args.zstd else "gzip"
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(ARCHIVE_SUFFIXES))
+        else:
+            files.append(path)
+
+    before = after = 0
+    for path in files:
+        if detect(path) != "none" or path.endswith(".tmp"):
+            continue
+        size = os.path.getsize(path)
+        target = compress_file(path, compression, args.keep)
+        before += size
+        after += os.path.getsize(target)
+        print(f"{path} -> {target} ({size} -> {os.path.getsize(target)} bytes)")
+
+    if before:
+        print(f"Total: {before} -> {after} bytes ({after / before * 100:.1f}%)")
+    else:
+        print("Nothing to compress")
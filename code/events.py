@@ -0,0 +1,127 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Structured event log of an agent (--events FILE), one JSON object per line:
+
+    {"t": 1760867969.104, "pid": 4242, "event": "call", "agent": "agent.py", "run": 0,
+     "iteration": 3, "call": 17, "phase": "verify", "source": "api",
+     "request_hash": "9f2c41d07a6be513", "request_bytes": 48211, "response_bytes": 9120,
+     "latency": 83.412, "output_tokens": 6120}
+
+Events: run_start, iteration, call, verdict, solution, run_end. Requests are
+identified by hash and size; the request and response bodies are included
+only with include_bodies (--log-bodies), and interned in a BlobStore with
+--intern-blobs. Solution hashes are the ones of the artifact store, so
+events can be joined with it.
+"""
+
+import atexit
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+
+from compress import open_text
+
+def body_hash(body):
+    """Short hash of a serialized request or response body."""
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]
+
+def body_summary(data, body=None):
+    """
+    One-line stand-in for a payload or response dump in the text log. body is
+    the serialized data if the caller has it (the request body it sends).
+    """
+    if body is None:
+        body = json.dumps(data)
+    return f"({len(body)} bytes, sha256 {body_hash(body)}; full body with --log-bodies)"
+
+class EventLog:
+    def __init__(self, path, include_bodies=False, blobs=None, **fields):
+        self.path = path
+        self.include_bodies = include_bodies
+        # BlobStore the bodies are interned in (--intern-blobs), or None
+        self.blobs = blobs
+        # Fields of every event (agent, model, run) and of the current thread (iteration)
+        self._fields = dict(fields)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._calls = itertools.count()
+        self._file = open_text(path, 'a')
+        atexit.register(self.close)
+
+    def set(self, **fields):
+        """Set fields of all following events."""
+        self._fields.update(fields)
+
+    def set_local(self, **fields):
+        """Set fields of the following events of this thread."""
+        self._local.__dict__.update(fields)
+
+    def emit(self, event, **fields):
+        entry = {"t": round(time.time(), 3), "pid": os.getpid(), "event": event}
+        entry.update(self._fields)
+        entry.update(self._local.__dict__)
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+
+    def call(self, phase, source, payload, body=None, response=None, response_bytes=None, latency=None,
+             output_tokens=None, error=None):
+        """
+        Record one API call. source is "api", "cache" (--replay/--record) or
+        "spool"; body is the serialized payload if the caller has it.
+        """
+        if body is None:
+            body = json.dumps(payload)
+        fields = {
+            "call": next(self._calls),
+            "phase": phase,
+            "source": source,
+            "request_hash": body_hash(body),
+            "request_bytes": len(body),
+            "response_bytes": response_bytes,
+            "latency": round(latency, 3) if latency is not None else None,
+            "output_tokens": output_tokens,
+        }
+        if error is not None:
+            fields["error"] = error
+        if self.include_bodies:
+            fields["payload"] = payload
+            fields["response"] = response
+            if self.blobs is not None:
+                fields["payload"], fields["response"] = self.blobs.intern([payload, response])
+        self.emit("call", **fields)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
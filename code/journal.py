@@ -0,0 +1,195 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Append-only, crash-safe journal for agent memory files.
+
+Each checkpoint appends one compact JSON line holding only the fields that
+changed since the previous checkpoint:
+
+    {"op": "snapshot", "state": {...}}    full state (first record, after compaction)
+    {"op": "update", "set": {...}}        changed fields only
+
+replay_journal() folds the records back into the memory dict. A torn last
+line (the process died mid-append) is ignored, and memory files written by
+older versions (a single indented JSON document) are still read. Compaction
+rewrites the journal as a single snapshot into a temporary file and renames
+it over the original, so the file is never left half-written.
+
+A journal whose name ends in .gz or .zst is written compressed (see
+compress.py). Its torn tail cannot be cut off in place, so an existing
+compressed journal is compacted when it is reopened.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from compress import compression_of, open_text, read_bytes, read_text
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+def _fsync_path(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _fsync_dir(path):
+    _fsync_path(os.path.dirname(os.path.abspath(path)))
+
+def _read_records(path):
+    """
+    Read the journal records of path.
+
+    Returns:
+        tuple: (records, valid_bytes) where valid_bytes is the length of the
+        prefix made of complete records, or (None, 0) for a legacy file
+    """
+    data = read_bytes(path)
+    records = []
+    valid_bytes = 0
+    for line in data.split(b'\n')[:-1]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if not records and line.strip() == b'{':
+                # Indented JSON document written by older versions
+                return None, 0
+            break
+        if not isinstance(record, dict) or "op" not in record:
+            return None, 0
+        records.append(record)
+        valid_bytes += len(line) + 1
+    return records, valid_bytes
+
+def replay_journal(path):
+    """
+    Rebuild the memory dict from a journal (or a legacy JSON memory file).
+    Returns None if the file holds no complete record.
+    """
+    records, _ = _read_records(path)
+    if records is None:
+        return json.loads(read_text(path))
+    state = None
+    for record in records:
+        if record["op"] == "snapshot":
+            state = dict(record["state"])
+        elif record["op"] == "update" and state is not None:
+            state.update(record["set"])
+    return state
+
+class Journal:
+    """
+    Writer side of a memory journal.
+
+    fsync policy: "always" syncs every record, "interval" at most every
+    fsync_interval seconds (and on close), "never" leaves it to the OS.
+    """
+    def __init__(self, path, fsync="interval", fsync_interval=5.0, compact_every=100):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {FSYNC_POLICIES}")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._state = None
+        self._records = 0
+        self._last_sync = time.time()
+        self._file = None
+
+        if os.path.exists(path):
+            records, valid_bytes = _read_records(path)
+            if records is None or compression_of(path) != "none":
+                # Legacy JSON memory file or compressed journal: rewrite it right away
+                self._state = replay_journal(path)
+                self._compact()
+            else:
+                self._state = replay_journal(path) if records else None
+                self._records = len(records)
+                # Drop a torn trailing record before appending after it
+                if valid_bytes != os.path.getsize(path):
+                    with open(path, 'r+b') as f:
+                        f.truncate(valid_bytes)
+        if self._file is None:
+            self._file = open_text(path, 'a')
+        atexit.register(self.close)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._file.flush()
+        self._records += 1
+        now = time.time()
+        if self.fsync == "always" or (self.fsync == "interval" and now - self._last_sync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+
+    def _compact(self):
+        """Atomically replace the journal with a single snapshot of the current state."""
+        if self._file is not None:
+            self._file.close()
+        tmp_path = self.path + ".tmp"
+        with open_text(tmp_path, 'w', compression_of(self.path)) as f:
+            f.write(json.dumps({"op": "snapshot", "state": self._state}, ensure_ascii=False, separators=(',', ':')) + '\n')
+        # Synced after closing, once a compressed stream has written its trailer
+        _fsync_path(tmp_path)
+        os.replace(tmp_path, self.path)
+        _fsync_dir(self.path)
+        self._records = 1
+        self._last_sync = time.time()
+        self._file = open_text(self.path, 'a')
+
+    def append(self, state):
+        """Record a checkpoint of state, writing only what changed."""
+        with self._lock:
+            if self._state is None:
+                self._state = dict(state)
+                self._write({"op": "snapshot", "state": self._state})
+                return
+            changed = {k: v for k, v in state.items() if k not in self._state or self._state[k] != v}
+            if not changed:
+                return
+            self._state.update(changed)
+            if self._records >= self.compact_every:
+                self._compact()
+            else:
+                self._write({"op": "update", "set": changed})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                if self.fsync != "never":
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
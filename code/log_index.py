@@ -0,0 +1,169 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Sidecar index of agent logs.
+
+Next to LOG (or LOG.gz, LOG.zst) the agent writes LOG.idx, one JSON line per entry with the byte
+offset in the log where the entry starts:
+
+    {"offset": 81234, "kind": "run", "run": 0}
+    {"offset": 81990, "kind": "iteration", "iteration": 3}
+    {"offset": 82011, "kind": "marker", "text": "[...] >>>>>>> Verify the solution."}
+    {"offset": 95120, "kind": "solution", "run": 0}
+
+The reader seeks straight to the final solution or to any iteration, so
+extraction costs the same for a 1 KB and a 1 GB log. Offsets count
+uncompressed bytes; for a compressed log the reader decompresses it first.
+Logs without an index (older runs) are scanned as before.
+"""
+
+import argparse
+import json
+import os
+import re
+
+from compress import SUFFIXES, compression_of, detect, read_bytes, read_text
+
+SUCCESS_MARKER = "Found a correct solution in run"
+
+def index_path(log_file):
+    """LOG.idx, shared by LOG and its compressed variants (the offsets stay valid)."""
+    compression = compression_of(log_file)
+    if compression != "none":
+        log_file = log_file[:-len(SUFFIXES[compression])]
+    return log_file + ".idx"
+
+class LogIndexWriter:
+    def __init__(self, log_file, append=False):
+        self.offset = 0
+        if append and os.path.exists(log_file):
+            self.offset = os.path.getsize(log_file) if detect(log_file) == "none" else len(read_bytes(log_file))
+        self._file = open(index_path(log_file), 'a' if append else 'w', encoding='utf-8')
+
+    def advance(self, nbytes):
+        """Account for nbytes written to the log."""
+        self.offset += nbytes
+
+    def mark(self, kind, **fields):
+        """Index the current end of the log as the start of an entry."""
+        entry = {"offset": self.offset, "kind": kind}
+        entry.update(fields)
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+def read_index(log_file):
+    """Index entries of a log, or None if it has no index."""
+    try:
+        with open(index_path(log_file), 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return None
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            break
+    return entries
+
+def read_range(log_file, start, end=None):
+    """Text of the log between two byte offsets (end None: to the end)."""
+    if detect(log_file) != "none":
+        return read_bytes(log_file)[start:end].decode('utf-8', errors='replace')
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        data = f.read(-1 if end is None else end - start)
+    return data.decode('utf-8', errors='replace')
+
+def read_line_at(log_file, offset):
+    if detect(log_file) != "none":
+        return read_range(log_file, offset).split('\n', 1)[0]
+    with open(log_file, 'rb') as f:
+        f.seek(offset)
+        return f.readline().decode('utf-8', errors='replace').rstrip('\n')
+
+def has_solution(log_file):
+    """Whether the log records a correct solution."""
+    entries = read_index(log_file)
+    if entries is not None:
+        return any(e["kind"] == "solution" for e in entries)
+    return SUCCESS_MARKER in read_text(log_file)
+
+def find_solution(log_file):
+    """The final solution recorded in the log, or None."""
+    entries = read_index(log_file)
+    if entries is not None:
+        solutions = [e for e in entries if e["kind"] == "solution"]
+        if not solutions:
+            return None
+        return json.loads(read_line_at(log_file, solutions[-1]["offset"]))
+
+    # Older log without an index: scan it
+    log_content = read_text(log_file)
+    match = re.search(SUCCESS_MARKER + r' \d+\.\s*\n(.*?)(?=\n\n|\n>>>>>>>|\Z)', log_content, re.DOTALL)
+    if not match:
+        return None
+    text = match.group(1).strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def iteration_text(log_file, iteration, occurrence=-1):
+    """
+    Log text of one iteration of the correction loop, up to the next
+    iteration or run. occurrence picks among iterations with that number
+    (several runs, or resumes); the default is the last one.
+    """
+    entries = read_index(log_file)
+    if entries is None:
+        raise ValueError(f"{log_file} has no index")
+    starts = [k for k, e in enumerate(entries) if e["kind"] == "iteration" and e["iteration"] == iteration]
+    if not starts:
+        return None
+    k = starts[occurrence]
+    end = next((e["offset"] for e in entries[k + 1:] if e["kind"] in ("iteration", "run")), None)
+    return read_range(log_file, entries[k]["offset"], end)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Read agent logs through their index')
+    parser.add_argument('log_file', help='Agent log file')
+    parser.add_argument('--iteration', '-i', type=int, default=None, help='Print the log of this iteration')
+    parser.add_argument('--list', action='store_true', help='List the indexed runs, iterations and markers')
+    args = parser.parse_args()
+
+    if args.list:
+        for e in read_index(args.log_file) or []:
+            detail = e.get("text") or e.get("iteration", e.get("run", ""))
+            print(f"{e['offset']:>12}  {e['kind']:<10} {detail}")
+    elif args.iteration is not None:
+        text = iteration_text(args.log_file, args.iteration)
+        print(text if text is not None else f"No iteration {args.iteration} in {args.log_file}")
+    else:
+        solution = find_solution(args.log_file)
+        print(solution if solution is not None else f"No solution in {args.log_file}")
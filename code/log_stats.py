@@ -0,0 +1,254 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Statistics of agent logs: per-phase latencies and response sizes, iterations
+to success and the sequence of verifier verdicts, per group of logs.
+
+Each path given is one group (a directory of logs is typically one model), so
+models are compared side by side:
+
+    python log_stats.py run_logs run_logs_gpt5 run_logs_grok4
+
+Logs are parsed in one streaming pass over their lines, in parallel. Latencies
+come from the "[timestamp] >>>>>" markers (one-second resolution); logs
+written without timestamps still give iterations, verdicts and sizes.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compress import SUFFIXES, open_text
+
+# Markers logged before the request and after the response of each phase
+START_MARKERS = {
+    "Initial prompt.": "explore",
+    "Self improvement start:": "improve",
+    "Verification prompt:": "verify",
+    "New prompt:": "correct",
+}
+END_MARKERS = {
+    "First solution:": "explore",
+    "Corrected solution:": None,  # improve or correct, whichever is open
+    "Verification results:": "verify",
+    "Is verification good?": "verdict",
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def timestamp_seconds(stamp):
+    """Seconds since the epoch of a log timestamp (local time)."""
+    return time.mktime(time.strptime(stamp, TIMESTAMP_FORMAT))
+
+def _dump_length(line):
+    """Characters of a text dumped as a JSON string, or None if line is not one."""
+    if not line.startswith('"'):
+        return None
+    try:
+        return len(json.loads(line))
+    except ValueError:
+        return len(line)
+
+def parse_log(path):
+    """
+    Parse one agent log. Returns a dict with its runs (iterations, solved),
+    calls (phase, latency in seconds or None, response characters or None)
+    and verdicts (True for a pass), in log order.
+    """
+    stats = {"file": path, "runs": [], "calls": [], "verdicts": []}
+    open_phase, open_since = None, None
+    pending = None  # what the next line is the dump of: "size" or "verdict"
+    run = None
+
+    def begin(phase, ts):
+        nonlocal open_phase, open_since
+        open_phase, open_since = phase, ts
+
+    try:
+        f = open_text(path)
+    except OSError:
+        return stats
+    with f:
+        try:
+            for line in f:
+                line = line.rstrip('\n')
+                if pending is not None:
+                    kind, pending = pending, None
+                    if kind == "size" and stats["calls"]:
+                        stats["calls"][-1]["chars"] = _dump_length(line)
+                        continue
+                    if kind == "verdict" and line.startswith('"'):
+                        try:
+                            stats["verdicts"].append("yes" in json.loads(line).lower())
+                        except ValueError:
+                            pass
+                        continue
+
+                if line.startswith("Number of iterations: "):
+                    if run is not None:
+                        try:
+                            run["iterations"] = int(line[len("Number of iterations: "):].split(',', 1)[0]) + 1
+                        except ValueError:
+                            pass
+                    continue
+
+                # Markers: "[2025-08-12 08:08:44] >>>>>>> text", or ">>>>>>> text" in older logs
+                ts = None
+                if line.startswith('[') and line[21:27] == ' >>>>>':
+                    ts = timestamp_seconds(line[1:20])
+                    text = line[22:]
+                elif line.startswith('>>>>>'):
+                    text = line
+                else:
+                    continue
+                text = text.lstrip('>').strip()
+
+                if text.startswith("Run ") and " of " in text:
+                    run = {"iterations": 0, "solved": False}
+                    stats["runs"].append(run)
+                    open_phase = None
+                elif text.startswith("Found a correct solution in run"):
+                    if run is not None:
+                        run["solved"] = True
+                elif text in START_MARKERS:
+                    begin(START_MARKERS[text], ts)
+                elif text in END_MARKERS:
+                    phase = END_MARKERS[text] or open_phase
+                    if phase is not None and (open_phase == phase or END_MARKERS[text] is None):
+                        latency = ts - open_since if ts is not None and open_since is not None else None
+                        stats["calls"].append({"phase": phase, "latency": latency, "chars": None})
+                    pending = "verdict" if phase == "verdict" else "size"
+                    # The verification results are followed by the verdict call
+                    if phase == "verify":
+                        begin("verdict", ts)
+                    else:
+                        open_phase, open_since = None, None
+        except Exception:
+            # Truncated compressed log: keep what was parsed
+            pass
+    return stats
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+def _distribution(values):
+    if not values:
+        return None
+    return {"n": len(values), "mean": sum(values) / len(values), "p50": percentile(values, 50),
+            "p90": percentile(values, 90), "max": max(values)}
+
+def summarize(logs):
+    """Aggregate the parsed logs of one group."""
+    calls, runs, verdicts, sequences = {}, [], [], {}
+    for log in logs:
+        runs.extend(log["runs"])
+        verdicts.extend(log["verdicts"])
+        sequences[log["file"]] = ''.join('P' if v else 'F' for v in log["verdicts"])
+        for call in log["calls"]:
+            calls.setdefault(call["phase"], []).append(call)
+    phases = {}
+    for phase in ("explore", "improve", "verify", "verdict", "correct"):
+        if phase in calls:
+            phases[phase] = {
+                "calls": len(calls[phase]),
+                "latency": _distribution([c["latency"] for c in calls[phase] if c["latency"] is not None]),
+                "chars": _distribution([c["chars"] for c in calls[phase] if c["chars"] is not None]),
+            }
+    solved = [r["iterations"] for r in runs if r["solved"]]
+    longest, streak = 0, 0
+    for v in verdicts:
+        streak = 0 if v else streak + 1
+        longest = max(longest, streak)
+    return {
+        "logs": len(logs),
+        "runs": len(runs),
+        "solved": len(solved),
+        "iterations_to_success": _distribution(solved),
+        "verdicts": len(verdicts),
+        "passed": sum(verdicts),
+        "longest_fail_streak": longest,
+        "phases": phases,
+        "sequences": sequences,
+    }
+
+def _log_files(path):
+    if not os.path.isdir(path):
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        for name in sorted(names):
+            base = name
+            for suffix in SUFFIXES.values():
+                if base.endswith(suffix):
+                    base = base[:-len(suffix)]
+            if base.endswith(".log"):
+                files.append(os.path.join(root, name))
+    return files
+
+def _fmt(value, digits=0):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+def print_report(name, summary, verbose=False):
+    print(f"== {name}: {summary['logs']} log(s), {summary['runs']} run(s), {summary['solved']} solved")
+    print(f"  {'phase':<8} {'calls':>6} {'latency s':>9} {'p50':>6} {'p90':>6} {'max':>6}   {'chars mean':>10} {'p90':>8}")
+    for phase, p in summary["phases"].items():
+        lat, chars = p["latency"] or {}, p["chars"] or {}
+        print(f"  {phase:<8} {p['calls']:>6} {_fmt(lat.get('mean')):>9} {_fmt(lat.get('p50')):>6} {_fmt(lat.get('p90')):>6} "
+              f"{_fmt(lat.get('max')):>6}   {_fmt(chars.get('mean')):>10} {_fmt(chars.get('p90')):>8}")
+    its = summary["iterations_to_success"]
+    if its:
+        print(f"  iterations to success: mean {its['mean']:.1f}, median {its['p50']}, max {its['max']}")
+    if summary["verdicts"]:
+        print(f"  verifier: {summary['passed']}/{summary['verdicts']} passed "
+              f"({summary['passed'] / summary['verdicts'] * 100:.1f}%), longest fail streak {summary['longest_fail_streak']}")
+    if verbose:
+        for file, sequence in summary["sequences"].items():
+            print(f"    {os.path.basename(file)}: {sequence or '-'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Latency, iteration and verdict statistics of agent logs')
+    parser.add_argument('paths', nargs='+', help='Log files or directories; each one is reported as a group')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                        help='Number of logs parsed in parallel (default: number of CPUs)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show the verdict sequence of every log (P/F)')
+    parser.add_argument('--json', action='store_true', help='Print the statistics as JSON')
+    args = parser.parse_args()
+
+    groups = {path: _log_files(path) for path in args.paths}
+    files = [f for fs in groups.values() for f in fs]
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        parsed = dict(zip(files, executor.map(parse_log, files, chunksize=2)))
+
+    summaries = {path.rstrip('/'): summarize([parsed[f] for f in fs]) for path, fs in groups.items()}
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    else:
+        for name, summary in summaries.items():
+            print_report(name, summary, args.verbose)
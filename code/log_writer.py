@@ -0,0 +1,376 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Background writer of agent logs.
+
+log_print hands each line to a LogWriter, which writes it to stdout, the log
+file and the log index (see log_index.py) from a background thread, in
+batches. The queue is bounded, so a writer that falls behind slows the agent
+down instead of growing without limit. Flush modes (--log-flush):
+
+    always    write and flush every line in the calling thread (no thread)
+    interval  flush at most every FLUSH_INTERVAL seconds (default)
+    never     flush only when buffers fill up and when the log is closed
+
+Whatever the mode, the log is flushed when it is closed, which the agents do
+before exiting on a cancellation (SIGTERM/SIGINT) and at interpreter exit.
+
+What is logged at all is decided by a LogFilter (--log-level, --log-phases):
+
+    quiet     runs, the final solution, cancellation and errors
+    summary   also the phase markers, iteration counters and verdicts
+    debug     also solutions, verification logs, bug reports and request
+              summaries (default)
+    trace     also the full request payloads and raw responses
+
+With a size cap (--log-max-bytes N), the log file keeps its first N/2 bytes;
+the lines after that go to a tail file (<log>.tail) rotated every N/4 bytes
+into <log>.tail.1, so at most the last N/2 bytes are kept. The index entries
+of the tail lines, and the lines logged at quiet level (runs, the final
+solution, errors), are recorded in <log>.tail.idx. When the log is closed, or
+resumed after the agent was killed, the tail is appended to it after a line
+telling how much was omitted, and the quiet lines of the omitted part follow
+that line: the head stays a prefix of the log as it was logged, and the log
+and its index stay in order. A new log removes the tail files of an older
+one. Sizes are those of the uncompressed text.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from compress import SUFFIXES, compression_of
+
+FLUSH_MODES = ("always", "interval", "never")
+LOG_LEVELS = ("quiet", "summary", "debug", "trace")
+PHASES = ("explore", "improve", "verify", "verdict", "check_complete", "correct")
+FLUSH_INTERVAL = 1.0
+
+# Lines taken from the queue per write
+BATCH_SIZE = 1000
+
+SIZE_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+def parse_size(text):
+    """Parse a size in bytes with an optional K, M or G suffix ("500M")."""
+    text = str(text).strip().upper().rstrip("B")
+    if text and text[-1] in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[text[-1]])
+    return int(text)
+
+def tail_path(log_file):
+    """Tail file of a size-capped log, shared by the log and its compressed variants."""
+    compression = compression_of(log_file)
+    if compression != "none":
+        log_file = log_file[:-len(SUFFIXES[compression])]
+    return log_file + ".tail"
+
+class LogFilter:
+    """
+    Lines up to level are logged; with phases, the debug and trace lines of
+    the other phases are dropped (lines without a phase are always kept).
+    """
+    def __init__(self, level="debug", phases=None):
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level '{level}', expected one of {LOG_LEVELS}")
+        unknown = set(phases or ()) - set(PHASES)
+        if unknown:
+            raise ValueError(f"Unknown phase(s) {sorted(unknown)}, expected some of {PHASES}")
+        self.level = LOG_LEVELS.index(level)
+        self.phases = set(phases) if phases else None
+
+    def enabled(self, level, phase=None):
+        rank = LOG_LEVELS.index(level)
+        if rank > self.level:
+            return False
+        return rank <= LOG_LEVELS.index("summary") or self.phases is None or phase is None or phase in self.phases
+
+class LogWriter:
+    def __init__(self, file, index=None, flush="interval", stdout=None, max_queue=10000, max_bytes=None, tail=None,
+                 append=False):
+        if flush not in FLUSH_MODES:
+            raise ValueError(f"Unknown flush mode '{flush}', expected one of {FLUSH_MODES}")
+        if max_bytes is not None and tail is None:
+            raise ValueError("A size-capped log needs a tail file")
+        self.file = file
+        self.index = index
+        self.flush_mode = flush
+        self.stdout = stdout or sys.stdout
+        self.error = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        # Size cap: bytes written to the log file (also before a resume), and the rotated tail
+        self.max_bytes = max_bytes
+        self.size = index.offset if index is not None else 0
+        self._tail_path = tail
+        self._tail = None
+        self._tail_size = 0
+        self._journal = None
+        # Number of rotations of the tail, and the bytes of keep lines in each tail segment
+        self._segment = 0
+        self._kept_bytes = {}
+        self._omitted = 0
+        self._pending_marks = []
+        if tail is not None:
+            if append:
+                # The tail of a previous session that was killed before closing its log
+                self._splice_tail(recovered=True)
+            else:
+                # Left by an older, killed session: the log it belonged to is overwritten
+                self._remove_tail()
+        if flush != "always":
+            self._queue = queue.Queue(maxsize=max_queue)
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, message, marker=False, keep=False):
+        """
+        Log one line; marker lines (">>>>>") are indexed. keep lines are
+        never dropped from a log over its size cap: those that rotate out of
+        its tail are put back where the omitted part was.
+        """
+        self._put(("line", message, (marker, keep)))
+
+    def mark(self, kind, **fields):
+        """Index the next line as the start of a run, iteration or the final solution."""
+        self._put(("mark", kind, fields))
+
+    def _put(self, item):
+        # Under the lock, so that nothing is queued after the end of the queue put by close()
+        # (the writer thread never takes the lock, so a full queue still drains)
+        with self._lock:
+            if self._closed:
+                return False
+            if self._thread is None:
+                self._write([item], flush=True)
+            else:
+                self._queue.put(item)
+            return True
+
+    def flush(self):
+        """Block until everything logged so far is written and flushed."""
+        if self._thread is not None:
+            done = threading.Event()
+            if self._put(("flush", done, None)):
+                done.wait()
+
+    def _capped(self, n):
+        """Whether a line of n bytes goes past the head of a size-capped log."""
+        if self.max_bytes is None:
+            return False
+        if self._tail is None and self.size + n > self.max_bytes // 2:
+            self._tail = open(self._tail_path, 'a', encoding='utf-8')
+            self._tail_size = self._tail.tell()
+            self._journal = open(self._tail_path + ".idx", 'a', encoding='utf-8')
+        return self._tail is not None
+
+    def _write(self, items, flush):
+        lines, console, tail, journal = [], [], [], []
+        tail_bytes = 0
+        for kind, a, b in items:
+            if kind == "mark":
+                # Indexed with the line it points to, which may go to the tail
+                self._pending_marks.append((a, b))
+            elif kind == "line":
+                marker, keep = b
+                line = a + '\n'
+                n = len(line.encode('utf-8'))
+                console.append(line)
+                marks, self._pending_marks = self._pending_marks, []
+                if self._capped(n):
+                    # Indexed when the tail is appended to the log, if the line is still there
+                    if marker:
+                        marks.append(("marker", {"text": a[:160]}))
+                    if marks or keep:
+                        entry = {"segment": self._segment, "offset": self._tail_size + tail_bytes, "marks": marks}
+                        if keep:
+                            entry["keep"] = line
+                            self._kept_bytes[self._segment] = self._kept_bytes.get(self._segment, 0) + n
+                        journal.append(json.dumps(entry, ensure_ascii=False) + '\n')
+                    tail.append(line)
+                    tail_bytes += n
+                    continue
+                if self.index is not None:
+                    for mark_kind, fields in marks:
+                        self.index.mark(mark_kind, **fields)
+                    if marker:
+                        self.index.mark("marker", text=a[:160])
+                    self.index.advance(n)
+                self.size += n
+                lines.append(line)
+        text = ''.join(lines)
+        try:
+            self.stdout.write(''.join(console))
+            self.file.write(text)
+            if tail:
+                self._write_tail(''.join(tail), ''.join(journal))
+            if flush:
+                self.stdout.flush()
+                self.file.flush()
+                if self._tail is not None:
+                    self._tail.flush()
+                    self._journal.flush()
+        except Exception as e:
+            # Keep draining the queue so the agent never blocks on a broken log
+            if self.error is None:
+                self.error = e
+                sys.stderr.write(f"Error writing log: {e}\n")
+
+    def _write_tail(self, text, journal):
+        self._tail.write(text)
+        self._journal.write(journal)
+        self._tail_size += len(text.encode('utf-8'))
+        if self._tail_size >= self.max_bytes // 4:
+            # Rotate: the previous rotated tail is dropped, but for its keep lines
+            self._tail.close()
+            rotated = self._tail_path + ".1"
+            if os.path.exists(rotated):
+                self._omitted += os.path.getsize(rotated) - self._kept_bytes.pop(self._segment - 1, 0)
+            os.replace(self._tail_path, rotated)
+            self._tail = open(self._tail_path, 'w', encoding='utf-8')
+            self._tail_size = 0
+            self._segment += 1
+            self._journal.write(json.dumps({"rotate": self._segment}) + '\n')
+
+    def _splice_tail(self, recovered=False):
+        """
+        Append the tail files to the log, after a line telling how much was
+        omitted and the keep lines of the omitted part, and index their lines.
+        """
+        for f in (self._tail, self._journal):
+            if f is not None:
+                f.close()
+        self._tail = self._journal = None
+        parts = []
+        for path in (self._tail_path + ".1", self._tail_path):
+            text = ""
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            parts.append(text)
+        if not any(parts):
+            self._remove_tail()
+            return
+        if not parts[1].endswith('\n'):
+            parts[1] += '\n'
+        # Index entries and keep lines of the tail; the segment in <log>.tail is the last rotation
+        entries, segment = [], 0
+        if os.path.exists(self._tail_path + ".idx"):
+            with open(self._tail_path + ".idx", 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Cut short when the agent was killed
+                        continue
+                    if "rotate" in entry:
+                        segment = entry["rotate"]
+                    else:
+                        entries.append(entry)
+        kept = [e for e in entries if e["segment"] < segment - 1 and "keep" in e]
+        tail_bytes = sum(len(part.encode('utf-8')) for part in parts)
+        if recovered:
+            note = "recovered after the agent was killed"
+        else:
+            note = f"{self._omitted} bytes omitted here"
+        header = f"[... log over its size cap ({note}), the last {tail_bytes} bytes follow ...]\n"
+        text = header + ''.join(e["keep"] for e in kept) + ''.join(parts)
+        self.file.write(text)
+        self.file.flush()
+        nbytes = len(text.encode('utf-8'))
+        if self.index is not None:
+            start = self.index.offset
+            # Offsets in the log of the indexed lines, in order
+            at = start + len(header.encode('utf-8'))
+            placed = []
+            for e in kept:
+                placed.append((at, e["marks"]))
+                at += len(e["keep"].encode('utf-8'))
+            for part, part_segment in zip(parts, (segment - 1, segment)):
+                size = len(part.encode('utf-8'))
+                placed.extend((at + e["offset"], e["marks"]) for e in entries
+                              if e["segment"] == part_segment and e["offset"] < size)
+                at += size
+            for offset, marks in placed:
+                self.index.advance(offset - self.index.offset)
+                for kind, fields in marks:
+                    self.index.mark(kind, **fields)
+            self.index.advance(start + nbytes - self.index.offset)
+        self.size += nbytes
+        self._remove_tail()
+
+    def _remove_tail(self):
+        for path in (self._tail_path + ".1", self._tail_path, self._tail_path + ".idx"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _run(self):
+        last_flush = time.time()
+        while True:
+            timeout = max(0.0, last_flush + FLUSH_INTERVAL - time.time()) if self.flush_mode == "interval" else None
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+            while len(items) < BATCH_SIZE:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is None for item in items)
+            waiters = [item[1] for item in items if item is not None and item[0] == "flush"]
+            due = self.flush_mode == "interval" and time.time() - last_flush >= FLUSH_INTERVAL
+            self._write([item for item in items if item is not None], flush=due or stop or bool(waiters))
+            if due or waiters:
+                last_flush = time.time()
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+    def close(self):
+        """Write everything still queued, flush, and close the log and its index."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        self.stdout.flush()
+        if self._tail_path is not None:
+            try:
+                self._splice_tail()
+            except Exception as e:
+                sys.stderr.write(f"Error appending the tail of the log: {e}\n")
+        self.file.close()
+        if self.index is not None:
+            self.index.close()
@@ -0,0 +1,163 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Record/replay store for API responses, used to rerun agents offline.
+
+Responses are keyed by the SHA-256 of the endpoint, the session and the
+canonical JSON payload, plus the number of responses to that same payload
+recorded before in the run. A replayed request gets the first recorded answer
+to its payload it has not been served yet (the n-th identical verification
+request gets the n-th recorded answer). Failed requests record nothing, so a
+retried call leaves no gap. The session tells apart the agents recording into one store
+(whose first requests are identical); the agents use the name of their log
+file, so a fleet is replayed by agents logging under the same names.
+In record mode every response is stored; in replay mode responses are served
+from the store and a miss is handled by the miss policy:
+
+    fail         raise ReplayMissError
+    passthrough  send the real request (and record its response)
+    mock         return a canned response built by the agent
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from compress import SUFFIXES
+
+MODES = ("record", "replay")
+MISS_POLICIES = ("fail", "passthrough", "mock")
+
+MOCK_TEXT = "Mock response (no recorded response for this request)."
+
+class ReplayMissError(BaseException):
+    """
+    Raised in replay mode when a request has no recorded response. Derives
+    from BaseException so that the agents' generic 'except Exception: retry'
+    handlers do not turn it into an error iteration.
+    """
+
+def session_of(log_file):
+    """Default session of an agent: the name of its log file, without directory or compression suffix."""
+    if not log_file:
+        return ""
+    name = os.path.basename(log_file)
+    for suffix in SUFFIXES.values():
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+def payload_hash(namespace, payload):
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256((namespace + "\n" + canonical).encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    def __init__(self, path, mode, miss_policy="fail", namespace="", mock_response=None, session=""):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {MODES}")
+        if miss_policy not in MISS_POLICIES:
+            raise ValueError(f"Unknown miss policy '{miss_policy}', expected one of {MISS_POLICIES}")
+        self.path = path
+        self.mode = mode
+        self.miss_policy = miss_policy
+        # Without a session, keys are those of stores recorded before sessions existed
+        self.namespace = f"{namespace}\n{session}" if session else namespace
+        self.session = session
+        self.mock_response = mock_response
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Payload hash -> next seq to record, and the seqs already served in replay mode
+        self._next_seq = {}
+        self._served = {}
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT NOT NULL, seq INTEGER NOT NULL, response TEXT NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (key, seq))")
+
+    @property
+    def offline(self):
+        """True if no real request can be sent, so no API key is needed."""
+        return self.mode == "replay" and self.miss_policy != "passthrough"
+
+    def lookup(self, payload):
+        """
+        Return the recorded response for payload, or None if the real request
+        should be sent (record mode, or a passthrough miss).
+
+        Returns:
+            tuple: (key, response) where key is passed back to store()
+        """
+        key = payload_hash(self.namespace, payload)
+        if self.mode == "record":
+            return key, None
+
+        with self._lock:
+            served = self._served.setdefault(key, set())
+            row = None
+            for seq, response in self._conn.execute(
+                    "SELECT seq, response FROM responses WHERE key = ? ORDER BY seq", (key,)):
+                if seq not in served:
+                    served.add(seq)
+                    row = response
+                    break
+        if row is not None:
+            self.hits += 1
+            return key, json.loads(row)
+
+        self.misses += 1
+        if self.miss_policy == "fail":
+            raise ReplayMissError(f"No recorded response for request {key[:12]} (#{len(served)}) of session "
+                                  f"'{self.session}' in {self.path}")
+        if self.miss_policy == "mock":
+            return key, self.mock_response(MOCK_TEXT)
+        return key, None
+
+    def store(self, key, response):
+        """Record the response of a request sent for real, as the next one of its payload."""
+        with self._lock:
+            seq = self._next_seq.get(key)
+            if seq is None:
+                seq = 0
+                if self.mode == "replay":
+                    # A passthrough miss: recorded after the responses already in the store
+                    row = self._conn.execute("SELECT MAX(seq) FROM responses WHERE key = ?", (key,)).fetchone()
+                    seq = 0 if row[0] is None else row[0] + 1
+            self._next_seq[key] = seq + 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, seq, response, created) VALUES (?, ?, ?, ?)",
+                (key, seq, json.dumps(response, ensure_ascii=False), time.time()))
+            if self.mode == "replay":
+                self._served.setdefault(key, set()).add(seq)
+
+    def summary(self):
+        if self.mode == "record":
+            return f"Recorded responses to {self.path}"
+        return f"Replayed {self.hits} responses from {self.path}, {self.misses} misses ({self.miss_policy})"
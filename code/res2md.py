@@ -1,18 +1,168 @@
-import sys
+"""
+Convert result files (JSONL results, or agent logs ending with the JSON of
+the final solution) to Markdown.
+
+The last JSON record of a file is found by reading it backwards from the end,
+so the cost does not depend on the size of the file; compressed files are
+streamed. For agent logs with an index (see log_index.py) the final solution
+is taken from the index. Directories are converted file by file, in parallel:
+
+    python res2md.py logs/results.jsonl                # Markdown on stdout
+    python res2md.py run_logs run_logs_gpt5 -o reports # one .md per file
+"""
+
+import argparse
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from compress import SUFFIXES, detect, open_text
+from log_index import find_solution, index_path
+
+# Files picked up in directories (also when compressed)
+RESULT_SUFFIXES = (".jsonl", ".json", ".log")
+# Files next to the logs in a run directory that are not results: event logs,
+# interned blobs, the fleet state of run_parallel.py and the spool directories
+SIDECAR_SUFFIXES = (".events.jsonl", ".blobs.jsonl")
+SIDECAR_NAMES = ("fleet_state.json",)
+SIDECAR_DIR_SUFFIXES = (".spool",)
+
+BLOCK_SIZE = 1 << 16
+
+def _lines_backwards(path):
+    """Lines of an uncompressed file, last first, read in blocks from the end."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b''
+        while pos > 0:
+            step = min(BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + tail).split(b'\n')
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                yield line
+        yield tail
+
+def _looks_like_json(line):
+    return line[:1] in ('{', '[', '"')
+
+def last_record(path):
+    """The last line of a file that parses as JSON, or None."""
+    if detect(path) == "none":
+        for raw in _lines_backwards(path):
+            line = raw.decode('utf-8', errors='replace').strip()
+            if _looks_like_json(line):
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    continue
+        return None
+
+    # Compressed: stream it, remembering the last candidates
+    candidates = []
+    try:
+        with open_text(path) as f:
+            for line in f:
+                line = line.strip()
+                if _looks_like_json(line):
+                    candidates = candidates[-7:] + [line]
+    except Exception:
+        # Truncated tail (agent killed while writing): use what was read
+        pass
+    for line in reversed(candidates):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
+
+def to_markdown(record, title=None):
+    """Markdown of a record: a text as is, a dict as one section per key."""
+    parts = [f"# {title}\n"] if title else []
+    if isinstance(record, str):
+        parts.append(record.strip() + "\n")
+    elif isinstance(record, dict):
+        for key, value in record.items():
+            parts.append(f"## {key}\n")
+            if isinstance(value, str):
+                parts.append(value.strip() + "\n")
+            else:
+                parts.append("```json\n" + json.dumps(value, indent=2, ensure_ascii=False) + "\n```\n")
+    else:
+        parts.append("```json\n" + json.dumps(record, indent=2, ensure_ascii=False) + "\n```\n")
+    return "\n".join(parts)
+
+def _strip_compression(name):
+    for suffix in SUFFIXES.values():
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def iter_result_files(paths):
+    """Files given directly, and the result files below the directories given."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path, os.path.basename(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.endswith(SIDECAR_DIR_SUFFIXES))
+            for name in sorted(names):
+                base = _strip_compression(name)
+                if base.endswith(RESULT_SUFFIXES) and not base.endswith(SIDECAR_SUFFIXES) \
+                        and base not in SIDECAR_NAMES:
+                    full = os.path.join(root, name)
+                    yield full, os.path.relpath(full, os.path.dirname(os.path.abspath(path)))
+
+def convert(job):
+    """Convert one file; writes <output_dir>/<relative path>.md if output_dir is set."""
+    path, relative, output_dir, with_title = job
+    try:
+        # Agent logs with an index: their final solution, whatever follows it
+        record = find_solution(path) if os.path.exists(index_path(path)) else last_record(path)
+    except OSError as e:
+        return path, None, f"cannot read: {e}"
+    if record is None:
+        return path, None, "no JSON record found"
+    markdown = to_markdown(record, _strip_compression(relative) if with_title else None)
+    if output_dir is None:
+        return path, markdown, None
+    target = os.path.join(output_dir, os.path.splitext(_strip_compression(relative))[0] + ".md")
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write(markdown)
+    return path, target, None
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python res2md.py <result_file>")
-        sys.exit(1)
-
-    result_file = sys.argv[1]
-    with open(result_file, "r") as f:
-        data = f.readlines()
-        if len(data) == 0:
-            print("No data found in the file")
-            sys.exit(1)
-        data = data[-1].strip()
-
-        j = json.loads(data)
-        print(j)
+    parser = argparse.ArgumentParser(description='Convert result files and agent logs to Markdown')
+    parser.add_argument('paths', nargs='+', help='Result files or directories of them')
+    parser.add_argument('--output-dir', '-o', type=str, default=None,
+                        help='Write one .md per file here (default: print the Markdown)')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                        help='Number of files converted in parallel (default: number of CPUs)')
+    args = parser.parse_args()
+
+    single = len(args.paths) == 1 and not os.path.isdir(args.paths[0])
+    jobs = ((path, relative, args.output_dir, not single) for path, relative in iter_result_files(args.paths))
+
+    def report(results):
+        failed = 0
+        for path, result, error in results:
+            if error:
+                failed += 1
+                print(f"{path}: {error}", file=sys.stderr)
+            elif args.output_dir:
+                print(f"{path} -> {result}")
+            else:
+                sys.stdout.write(result + ("\n" if single else "\n---\n\n"))
+        return failed
+
+    if single:
+        failed = report(map(convert, jobs))
+    else:
+        # Results are reported in input order as soon as they are ready
+        with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+            failed = report(executor.map(convert, jobs, chunksize=4))
+    sys.exit(1 if failed else 0)
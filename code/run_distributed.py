@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Multi-node runner: a coordinator enqueues agent jobs into a durable SQLite
+queue and workers on any host that can reach the queue file pull jobs, report
+progress back and stop as soon as the fleet is marked as solved.
+
+    python run_distributed.py coordinator problem.txt --queue runs.db -n 1000 -e
+    python run_distributed.py worker --queue runs.db --slots 8
+    python run_distributed.py status --queue runs.db
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from run_parallel import build_agent_command, log_has_solution
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fleets (
+    name TEXT PRIMARY KEY,
+    problem_file TEXT NOT NULL,
+    created REAL NOT NULL,
+    exit_on_solution INTEGER NOT NULL DEFAULT 0,
+    stop INTEGER NOT NULL DEFAULT 0,
+    solved_agent INTEGER
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fleet TEXT NOT NULL,
+    agent_id INTEGER NOT NULL,
+    problem_file TEXT NOT NULL,
+    agent_file TEXT NOT NULL,
+    other_prompts TEXT NOT NULL,
+    log_dir TEXT NOT NULL,
+    timeout INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started REAL,
+    heartbeat REAL,
+    finished REAL,
+    log_bytes INTEGER NOT NULL DEFAULT 0,
+    progress TEXT,
+    return_code INTEGER,
+    solved INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (fleet, agent_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+# Job states: pending -> running -> done | failed | cancelled
+
+def connect(queue_file):
+    """
+    Open the queue database. The default rollback journal is used rather than
+    WAL so that the file can live on a filesystem shared between hosts.
+    """
+    conn = sqlite3.connect(queue_file, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+def enqueue_fleet(conn, fleet, problem_file, num_agents, log_dir, agent_file, other_prompts, timeout, exit_on_solution):
+    """Create a fleet and its jobs. Existing jobs of the same fleet are kept."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "INSERT OR IGNORE INTO fleets (name, problem_file, created, exit_on_solution) VALUES (?, ?, ?, ?)",
+            (fleet, problem_file, time.time(), int(exit_on_solution)))
+        conn.executemany(
+            "INSERT OR IGNORE INTO jobs (fleet, agent_id, problem_file, agent_file, other_prompts, log_dir, timeout) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(fleet, i, problem_file, agent_file, json.dumps(other_prompts), log_dir, timeout) for i in range(num_agents)])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def claim_job(conn, worker, fleet=None):
+    """Atomically move the oldest pending job of a running fleet to 'running'."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        query = ("SELECT jobs.* FROM jobs JOIN fleets ON fleets.name = jobs.fleet "
+                 "WHERE jobs.status = 'pending' AND fleets.stop = 0")
+        params = ()
+        if fleet:
+            query += " AND jobs.fleet = ?"
+            params = (fleet,)
+        row = conn.execute(query + " ORDER BY jobs.id LIMIT 1", params).fetchone()
+        if row is not None:
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "started = ?, heartbeat = ?, log_bytes = 0, progress = NULL WHERE id = ?",
+                (worker, now, now, row["id"]))
+        conn.execute("COMMIT")
+        return row
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def requeue_stale(conn, lease, max_attempts):
+    """Return running jobs whose worker stopped sending heartbeats to the queue."""
+    cutoff = time.time() - lease
+    conn.execute(
+        "UPDATE jobs SET status = 'pending', worker = NULL WHERE status = 'running' "
+        "AND heartbeat < ? AND attempts < ?", (cutoff, max_attempts))
+    conn.execute(
+        "UPDATE jobs SET status = 'failed', finished = ? WHERE status = 'running' "
+        "AND heartbeat < ? AND attempts >= ?", (time.time(), cutoff, max_attempts))
+
+def fleet_stopped(conn, fleet):
+    row = conn.execute("SELECT stop FROM fleets WHERE name = ?", (fleet,)).fetchone()
+    return row is None or bool(row["stop"])
+
+def _last_marker(log_file, tail_bytes=8192):
+    """Return the last '>>>>>>>' line of a log, reading only its tail."""
+    try:
+        with open(log_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - tail_bytes))
+            lines = f.read().decode('utf-8', errors='replace').splitlines()
+    except Exception:
+        return None
+    for line in reversed(lines):
+        if '>>>>>>>' in line:
+            return line.strip()[:200]
+    return None
+
+def _kill_group(proc, sig=signal.SIGTERM):
+    try:
+        os.killpg(os.getpgid(proc.pid), sig)
+    except Exception:
+        try:
+            proc.kill()
+        except Exception:
+            pass
+
+def run_job(queue_file, job, worker, poll_interval, running=None, stopping=None):
+    """
+    Run one claimed job, streaming its progress into the queue, and record
+    the outcome. Returns True if the agent found a solution. The agent's
+    process is registered in running (job id -> process) while it runs; a job
+    whose agent was killed because stopping is set goes back to 'pending'.
+    """
+    conn = connect(queue_file)
+    other_prompts = json.loads(job["other_prompts"])
+    log_dir = job["log_dir"]
+    os.makedirs(log_dir, exist_ok=True)
+    cmd, log_file = build_agent_command(job["agent_id"], job["problem_file"], log_dir, other_prompts, job["agent_file"])
+
+    stderr_path = os.path.join(log_dir, f"agent_{job['agent_id']:02d}.stderr")
+    started = time.time()
+    with open(stderr_path, 'w', encoding='utf-8') as stderr_file:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr_file,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            start_new_session=True,
+        )
+        if running is not None:
+            running[job["id"]] = proc
+        if stopping is not None and stopping.is_set():
+            # Started while the worker was being interrupted
+            _kill_group(proc)
+        status = None
+        while proc.poll() is None:
+            time.sleep(poll_interval)
+            try:
+                log_bytes = os.path.getsize(log_file)
+            except OSError:
+                log_bytes = 0
+            conn.execute("UPDATE jobs SET heartbeat = ?, log_bytes = ?, progress = ? WHERE id = ?",
+                         (time.time(), log_bytes, _last_marker(log_file), job["id"]))
+            if fleet_stopped(conn, job["fleet"]):
+                status = "cancelled"
+                _kill_group(proc)
+            elif job["timeout"] and time.time() - started > job["timeout"]:
+                status = "failed"
+                _kill_group(proc, signal.SIGKILL)
+        return_code = proc.returncode
+        if running is not None:
+            running.pop(job["id"], None)
+
+    if stopping is not None and stopping.is_set() and return_code != 0:
+        # The worker was interrupted: another worker runs the job again
+        conn.execute("UPDATE jobs SET status = 'pending', worker = NULL WHERE id = ? AND status = 'running'",
+                     (job["id"],))
+        conn.close()
+        print(f"[{worker}] Agent {job['agent_id']:02d} of fleet {job['fleet']}: requeued", flush=True)
+        return False
+
+    solved = return_code == 0 and log_has_solution(log_file)
+    if status is None:
+        status = "done" if return_code == 0 else "failed"
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, finished = ?, heartbeat = ?, return_code = ?, solved = ? WHERE id = ?",
+            (status, time.time(), time.time(), return_code, int(solved), job["id"]))
+        if solved:
+            conn.execute(
+                "UPDATE fleets SET solved_agent = COALESCE(solved_agent, ?), "
+                "stop = CASE WHEN exit_on_solution = 1 THEN 1 ELSE stop END WHERE name = ?",
+                (job["agent_id"], job["fleet"]))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.close()
+    print(f"[{worker}] Agent {job['agent_id']:02d} of fleet {job['fleet']}: {status}"
+          f"{' (SOLUTION FOUND)' if solved else ''}", flush=True)
+    return solved
+
+def worker_main(args):
+    worker = args.name or f"{socket.gethostname()}:{os.getpid()}"
+    running = {}  # job id -> agent process, of all slots
+    stopping = threading.Event()
+    print(f"[{worker}] Pulling jobs from {args.queue} with {args.slots} slot(s)", flush=True)
+
+    def slot(index):
+        slot_conn = connect(args.queue)
+        name = f"{worker}/{index}"
+        while not stopping.is_set():
+            job = claim_job(slot_conn, name, args.fleet)
+            if job is None:
+                if not args.wait:
+                    return
+                time.sleep(args.poll)
+                continue
+            if args.log_dir:
+                job = dict(job)
+                job["log_dir"] = args.log_dir
+            try:
+                run_job(args.queue, job, name, args.poll, running, stopping)
+            except Exception as e:
+                print(f"[{name}] Job {job['id']} failed with error: {e}", flush=True)
+
+    threads = [threading.Thread(target=slot, args=(i,), daemon=True) for i in range(args.slots)]
+    for t in threads:
+        t.start()
+    try:
+        # Polled rather than joined: a Ctrl-C inside Thread.join() can leave the thread looking finished
+        while any(t.is_alive() for t in threads):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        # The agents run in their own sessions, so they did not get the Ctrl-C:
+        # kill them rather than leave them running next to their requeued jobs
+        print(f"[{worker}] Interrupted; stopping {len(running)} running agent(s) and requeueing their jobs.", flush=True)
+        stopping.set()
+        for proc in list(running.values()):
+            _kill_group(proc)
+        deadline = time.time() + args.poll + 10
+        while any(t.is_alive() for t in threads) and time.time() < deadline:
+            time.sleep(0.1)
+        return 130
+    return 0
+
+def print_fleet_status(conn, fleet):
+    counts = dict(conn.execute(
+        "SELECT status, COUNT(*) FROM jobs WHERE fleet = ? GROUP BY status", (fleet,)).fetchall())
+    solved = conn.execute("SELECT COUNT(*) FROM jobs WHERE fleet = ? AND solved = 1", (fleet,)).fetchone()[0]
+    workers = conn.execute(
+        "SELECT COUNT(DISTINCT worker) FROM jobs WHERE fleet = ? AND status = 'running'", (fleet,)).fetchone()[0]
+    summary = ", ".join(f"{k}: {counts.get(k, 0)}" for k in ("pending", "running", "done", "failed", "cancelled"))
+    print(f"[{time.strftime('%H:%M:%S')}] Fleet {fleet} - {summary}, solved: {solved}, active workers: {workers}", flush=True)
+    return counts, solved
+
+def coordinator_main(args):
+    fleet = args.fleet or os.path.splitext(os.path.basename(args.problem_file))[0]
+    other_prompts = args.other_prompts.split(',') if args.other_prompts else []
+    log_dir = os.path.abspath(args.log_dir)
+    conn = connect(args.queue)
+    enqueue_fleet(conn, fleet, args.problem_file, args.num_agents, log_dir, args.agent_file,
+                  other_prompts, args.timeout, args.exit_immediately)
+    print(f"Enqueued {args.num_agents} agents for fleet {fleet} in {args.queue}")
+    if args.no_wait:
+        return 0
+
+    start_time = time.time()
+    try:
+        while True:
+            requeue_stale(conn, args.lease, args.max_attempts)
+            counts, solved = print_fleet_status(conn, fleet)
+            active = counts.get("pending", 0) + counts.get("running", 0)
+            if fleet_stopped(conn, fleet):
+                # Nothing new gets claimed; wait for workers to cancel their jobs
+                conn.execute("UPDATE jobs SET status = 'cancelled' WHERE fleet = ? AND status = 'pending'", (fleet,))
+                if counts.get("running", 0) == 0:
+                    break
+            elif active == 0:
+                break
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        print("\nStopping fleet; workers will cancel their running jobs...")
+        conn.execute("UPDATE fleets SET stop = 1 WHERE name = ?", (fleet,))
+
+    row = conn.execute("SELECT solved_agent FROM fleets WHERE name = ?", (fleet,)).fetchone()
+    print("\n" + "=" * 50)
+    print("FINAL SUMMARY")
+    print("=" * 50)
+    print(f"Total execution time: {time.time() - start_time:.2f} seconds")
+    print_fleet_status(conn, fleet)
+    solved_agent = row["solved_agent"]
+    if solved_agent is not None:
+        print(f"\n🎉 SOLUTION FOUND by Agent {solved_agent:02d}! 🎉")
+        print(f"Log file with solution: {os.path.join(log_dir, f'agent_{solved_agent:02d}.log')}")
+        return 0
+    return 1
+
+def status_main(args):
+    conn = connect(args.queue)
+    fleets = [args.fleet] if args.fleet else [r["name"] for r in conn.execute("SELECT name FROM fleets ORDER BY created")]
+    for fleet in fleets:
+        print_fleet_status(conn, fleet)
+        if args.verbose:
+            for job in conn.execute("SELECT * FROM jobs WHERE fleet = ? AND status = 'running' ORDER BY agent_id", (fleet,)):
+                print(f"  Agent {job['agent_id']:02d} on {job['worker']}: {job['log_bytes']} log bytes, "
+                      f"{time.time() - job['started']:.0f}s, last: {job['progress'] or '-'}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Run IMO agents across several hosts through a shared SQLite queue')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    coord = sub.add_parser('coordinator', help='Enqueue a fleet of agents and monitor it')
+    coord.add_argument('problem_file', help='Path to the problem statement file (as seen from the workers)')
+    coord.add_argument('--queue', '-q', required=True, help='Path to the queue database (shared by all hosts)')
+    coord.add_argument('--num-agents', '-n', type=int, default=10, help='Number of agents to enqueue (default: 10)')
+    coord.add_argument('--fleet', '-f', type=str, default=None, help='Fleet name (default: problem file name)')
+    coord.add_argument('--log-dir', '-d', default='logs', help='Directory to store log files (default: logs)')
+    coord.add_argument('--timeout', '-t', type=int, default=None, help='Timeout in seconds for each agent (default: no timeout)')
+    coord.add_argument('--other_prompts', '-o', type=str, help='Other prompts (optional)')
+    coord.add_argument('--agent-file', '-a', type=str, default='agent.py', help='Path to the agent file to run (default: agent.py)')
+    coord.add_argument('--exit-immediately', '-e', action='store_true',
+                       help='Stop the whole fleet when a solution is found (default: run all agents to completion)')
+    coord.add_argument('--lease', type=int, default=300,
+                       help='Seconds without heartbeat before a running job is requeued (default: 300)')
+    coord.add_argument('--max-attempts', type=int, default=3, help='Maximum attempts per job (default: 3)')
+    coord.add_argument('--poll', type=float, default=10, help='Status polling interval in seconds (default: 10)')
+    coord.add_argument('--no-wait', action='store_true', help='Only enqueue the jobs, do not monitor the fleet')
+
+    work = sub.add_parser('worker', help='Pull and run agent jobs from the queue')
+    work.add_argument('--queue', '-q', required=True, help='Path to the queue database (shared by all hosts)')
+    work.add_argument('--slots', '-w', type=int, default=1, help='Number of agents run concurrently by this worker (default: 1)')
+    work.add_argument('--fleet', '-f', type=str, default=None, help='Only run jobs of this fleet')
+    work.add_argument('--log-dir', '-d', type=str, default=None, help='Override the log directory of the jobs on this host')
+    work.add_argument('--name', type=str, default=None, help='Worker name (default: hostname:pid)')
+    work.add_argument('--poll', type=float, default=5, help='Heartbeat and polling interval in seconds (default: 5)')
+    work.add_argument('--wait', action='store_true', help='Keep waiting for new jobs when the queue is empty')
+
+    stat = sub.add_parser('status', help='Show the state of the fleets in the queue')
+    stat.add_argument('--queue', '-q', required=True, help='Path to the queue database')
+    stat.add_argument('--fleet', '-f', type=str, default=None, help='Only show this fleet')
+    stat.add_argument('--verbose', '-v', action='store_true', help='Show progress of running agents')
+
+    args = parser.parse_args()
+    if args.command == 'coordinator':
+        return coordinator_main(args)
+    if args.command == 'worker':
+        return worker_main(args)
+    return status_main(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -29,11 +29,33 @@ import os
 import sys
 import argparse
 import time
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import signal
 import threading
 import json
 import re
+from collections import Counter, deque
+
+from cancel import EXIT_CANCELLED
+from compress import add_suffix, resolve
+from log_index import find_solution, has_solution
+from log_writer import LOG_LEVELS, parse_size
+
+# Agent script used for each provider name accepted by --fleet
+PROVIDERS = {
+    "gemini": "agent.py",
+    "gpt5": "agent_oai.py",
+    "grok4": "agent_xai.py",
+}
+
+# Where the console output of the agents goes (--child-output); their log files hold it anyway
+CHILD_OUTPUTS = ("discard", "file")
+# Lines of console output kept in memory per agent for the status report, and their maximum length
+OUTPUT_TAIL = 20
+OUTPUT_LINE_MAX = 4096
+
+# Seconds between two measurements of the disk used by the log directory (--disk-budget)
+DISK_CHECK_INTERVAL = 10.0
 
 # Globals used within worker processes to forward termination to child agent
 current_child_process = None
@@ -65,7 +87,192 @@ def _install_worker_signal_handlers():
     signal.signal(signal.SIGINT, _forward_signal)
     _signal_handlers_installed = True
 
-def run_agent(agent_id, problem_file, log_dir, timeout=None, other_prompts=[], agent_file='agent.py'):
+def agent_log_path(log_dir, agent_id):
+    """Log file of an agent, or its compressed variant if that is what exists."""
+    return resolve(os.path.join(log_dir, f"agent_{agent_id:02d}.log"))
+
+def build_agent_command(agent_id, problem_file, log_dir, other_prompts=[], agent_file='agent.py', resume=False, store=None,
+                        compress=None, artifacts=None, warm_start=False, spool=False, log_level=None, events=False,
+                        log_max_bytes=None):
+    """
+    Build the command line for one agent instance. Every bundled agent (see
+    PROVIDERS) checkpoints into its own memory file so that an interrupted run
+    can be resumed, and watches the fleet's cancel file.
+    With compress ("gzip" or "zstd") the log and memory files are compressed.
+    With warm_start, agent N starts from the N-th best solution stored in
+    artifacts, so the fleet spreads over the stored candidates. With spool,
+    agents that stream their responses (agent_oai.py) spool them into
+    agent_XX.spool. log_level is passed as --log-level (None: the agents' default).
+    With events, the agent writes its event log to agent_XX.events.jsonl,
+    which the supervisor follows (see EventTail). log_max_bytes caps the size of
+    the agent's log (--log-max-bytes).
+
+    Returns:
+        tuple: (cmd, log_file)
+    """
+    log_file = add_suffix(os.path.join(log_dir, f"agent_{agent_id:02d}.log"), compress)
+    cmd = [
+        sys.executable, agent_file, 
+        problem_file,
+        "--log", log_file,
+        "--other_prompts", f'\"{",".join(other_prompts)}\"',
+    ]
+    if os.path.basename(agent_file) in PROVIDERS.values():
+        # Other agent scripts (e.g. community_codes/) do not accept these options
+        cmd.extend(["--cancel-file", cancel_file_path(log_dir),
+                    "--memory", os.path.abspath(add_suffix(os.path.join(log_dir, f"agent_{agent_id:02d}.mem"), compress))])
+    if resume:
+        cmd.append("--resume")
+    if store:
+        cmd.extend(["--store", os.path.abspath(store)])
+    if artifacts:
+        cmd.extend(["--artifacts", os.path.abspath(artifacts)])
+        if warm_start:
+            cmd.extend(["--warm-start", "--warm-start-rank", str(agent_id)])
+    if spool and os.path.basename(agent_file) == PROVIDERS["gpt5"]:
+        cmd.extend(["--spool", os.path.abspath(os.path.join(log_dir, f"agent_{agent_id:02d}.spool"))])
+    if log_level:
+        cmd.extend(["--log-level", log_level])
+    if events:
+        cmd.extend(["--events", events_path(log_dir, agent_id)])
+    if log_max_bytes:
+        cmd.extend(["--log-max-bytes", str(log_max_bytes)])
+    return cmd, log_file
+
+def events_path(log_dir, agent_id):
+    """Event log of an agent (see events.py), followed by the supervisor with --events."""
+    return os.path.abspath(os.path.join(log_dir, f"agent_{agent_id:02d}.events.jsonl"))
+
+class EventTail:
+    """
+    Follows the event logs of the running agents. Each poll returns the events
+    appended since the previous one; a line still being written is left for
+    the next poll. Only events written after an agent was launched are
+    returned, so the events of an earlier session of the same log directory
+    are not replayed.
+    """
+    def __init__(self):
+        self._files = {}
+
+    def follow(self, agent_id, path):
+        try:
+            offset = os.path.getsize(path)
+        except OSError:
+            offset = 0
+        self._files[agent_id] = [path, offset]
+
+    def unfollow(self, agent_id):
+        """Stop following an agent that exited, returning its last events."""
+        events = list(self._read(agent_id))
+        self._files.pop(agent_id, None)
+        return events
+
+    def poll(self):
+        for agent_id in list(self._files):
+            yield from self._read(agent_id)
+
+    def _read(self, agent_id):
+        entry = self._files.get(agent_id)
+        if entry is None:
+            return
+        path, offset = entry
+        try:
+            if os.path.getsize(path) <= offset:
+                return
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return
+        end = data.rfind(b'\n') + 1
+        entry[1] = offset + end
+        for line in data[:end].splitlines():
+            try:
+                yield agent_id, json.loads(line)
+            except ValueError:
+                continue
+
+def cancel_file_path(log_dir):
+    """Path of the file whose creation asks every agent of a run to stop."""
+    return os.path.abspath(os.path.join(log_dir, "CANCEL"))
+
+def cancel_agents(log_dir):
+    """Ask all running agents to stop cooperatively by creating the cancel file."""
+    with open(cancel_file_path(log_dir), 'w', encoding='utf-8') as f:
+        f.write(f"{time.time()}\n")
+
+def fleet_state_path(log_dir):
+    return os.path.join(log_dir, "fleet_state.json")
+
+def load_fleet_state(log_dir):
+    """Load the fleet state of a previous run, or None if there is none."""
+    try:
+        with open(fleet_state_path(log_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_fleet_state(log_dir, state):
+    """Atomically write the fleet state (agent assignments and statuses)."""
+    path = fleet_state_path(log_dir)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+def tokens_saved(stdout):
+    """Output tokens an agent reports it saved by being cancelled (0 if unknown)."""
+    match = re.search(r'estimated output tokens saved: (\d+)', stdout or "")
+    return int(match.group(1)) if match else 0
+
+def child_output_paths(log_dir, agent_id):
+    """Files the console output of an agent is written to with --child-output file."""
+    base = os.path.join(log_dir, f"agent_{agent_id:02d}")
+    return base + ".out", base + ".err"
+
+def _drain(stream, tail, sink=None):
+    """Read a child's output as it is produced, keeping only its last lines."""
+    try:
+        for line in stream:
+            tail.append(line if len(line) <= OUTPUT_LINE_MAX else line[:OUTPUT_LINE_MAX] + " [...]\n")
+            if sink is not None:
+                sink.write(line)
+    finally:
+        stream.close()
+        if sink is not None:
+            sink.close()
+
+def disk_usage(path):
+    """Bytes used by the files below path."""
+    total = 0
+    for root, dirs, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def log_max_bytes_for(num_agents, log_max_bytes=None, disk_budget=None):
+    """
+    Size cap of each agent's log: the cap asked for, lowered to an equal share
+    of the fleet's disk budget. The share is halved, leaving room for the tail
+    files, memory, index and event files of the agent.
+    """
+    caps = [c for c in (log_max_bytes, disk_budget // (2 * max(1, num_agents)) if disk_budget else None) if c]
+    return min(caps) if caps else None
+
+def log_has_solution(log_file):
+    """Check whether an agent log records a correct solution (from its index if it has one)."""
+    try:
+        return has_solution(log_file)
+    except Exception:
+        return False
+
+def run_agent(agent_id, problem_file, log_dir, timeout=None, other_prompts=[], agent_file='agent.py', resume=False, store=None,
+              compress=None, artifacts=None, warm_start=False, spool=False, log_level=None, child_output="discard",
+              output_tail=OUTPUT_TAIL, events=False, log_max_bytes=None):
     """
     Run a single agent instance with the specified parameters.
     
@@ -76,18 +283,23 @@ def run_agent(agent_id, problem_file, log_dir, timeout=None, other_prompts=[], a
         timeout: Timeout in seconds (None for no timeout)
         other_prompts: List of additional prompts to use
         agent_file: Path to the agent file to execute (default: agent.py)
+        resume: Resume the agent from its memory file
+        store: SQLite run store shared by all agents (None for no store)
+        compress: Compression of the log and memory files (None, "gzip" or "zstd")
+        artifacts: Solution artifact store directory shared by all agents (None for no store)
+        warm_start: Start from the solutions stored in artifacts
+        spool: Spool streamed responses (agent_oai.py only)
+        log_level: Log level of the agent (None for the agents' default)
+        child_output: "discard" the console output of the agent, or append it to agent_XX.out/.err ("file")
+        output_tail: Number of last lines of stdout and stderr kept for the status report
+        events: Let the agent write its event log to agent_XX.events.jsonl
+        log_max_bytes: Size cap of the agent's log (None for no cap)
     
     Returns:
-        tuple: (agent_id, return_code, stdout, stderr, solution_found)
+        tuple: (agent_id, return_code, stdout_tail, stderr_tail, solution_found)
     """
-    log_file = os.path.join(log_dir, f"agent_{agent_id:02d}.log")
-    
-    cmd = [
-        sys.executable, agent_file, 
-        problem_file,
-        "--log", log_file,
-        "--other_prompts", f'\"{",".join(other_prompts)}\"'
-    ]
+    cmd, log_file = build_agent_command(agent_id, problem_file, log_dir, other_prompts, agent_file, resume, store,
+                                        compress, artifacts, warm_start, spool, log_level, events, log_max_bytes)
     
     try:
         # Ensure worker can forward signals to child agent process
@@ -100,15 +312,26 @@ def run_agent(agent_id, problem_file, log_dir, timeout=None, other_prompts=[], a
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
+            errors='replace',
             cwd=os.path.dirname(os.path.abspath(__file__)),
             start_new_session=True,
         )
 
+        # Stream the output instead of buffering all of it (it duplicates the whole log)
+        tails = (deque(maxlen=output_tail), deque(maxlen=output_tail))
+        sinks = [None, None]
+        if child_output == "file":
+            sinks = [open(path, 'a', encoding='utf-8') for path in child_output_paths(log_dir, agent_id)]
+        readers = [threading.Thread(target=_drain, args=(stream, tail, sink), daemon=True)
+                   for stream, tail, sink in zip((current_child_process.stdout, current_child_process.stderr), tails, sinks)]
+        for reader in readers:
+            reader.start()
+
         try:
-            if timeout:
-                stdout_text, stderr_text = current_child_process.communicate(timeout=timeout)
-            else:
-                stdout_text, stderr_text = current_child_process.communicate()
+            current_child_process.wait(timeout=timeout or None)
+            for reader in readers:
+                reader.join()
+            stdout_text, stderr_text = (''.join(tail) for tail in tails)
         except subprocess.TimeoutExpired:
             # Kill process group on timeout
             try:
@@ -118,7 +341,9 @@ def run_agent(agent_id, problem_file, log_dir, timeout=None, other_prompts=[], a
                     current_child_process.kill()
                 except Exception:
                     pass
-            return (agent_id, -1, "", f"Agent {agent_id} timed out after {timeout} seconds", False)
+            for reader in readers:
+                reader.join(timeout=5)
+            return (agent_id, -1, ''.join(tails[0]), f"Agent {agent_id} timed out after {timeout} seconds", False)
         finally:
             return_code = current_child_process.returncode
             current_child_process = None
@@ -128,25 +353,73 @@ def run_agent(agent_id, problem_file, log_dir, timeout=None, other_prompts=[], a
         if return_code == 0:
             if "Found a correct solution in run" in stdout_text:
                 solution_found = True
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    log_content = f.read()
-                    if "Found a correct solution in run" in log_content:
-                        solution_found = True
-            except Exception:
-                pass
+            elif log_has_solution(log_file):
+                solution_found = True
 
         return (agent_id, return_code, stdout_text, stderr_text, solution_found)
     except Exception as e:
         return (agent_id, -1, "", f"Agent {agent_id} failed with error: {str(e)}", False)
 
+def parse_provider_map(spec, value_type=float):
+    """Parse a 'name=value,name=value' option into a dict."""
+    result = {}
+    if not spec:
+        return result
+    for item in spec.split(','):
+        name, sep, value = item.strip().partition('=')
+        if not sep:
+            raise ValueError(f"Expected name=value, got '{item}'")
+        result[name.strip()] = value_type(value)
+    return result
+
+def provider_agent_file(provider):
+    """Map a provider name to its agent script; unknown names are used as script paths."""
+    return PROVIDERS.get(provider, provider)
+
+def assign_providers(num_agents, weights):
+    """
+    Split num_agents between providers in proportion to weights (largest
+    remainder), interleaving them so every provider starts right away.
+
+    Returns:
+        list: provider name for each agent id
+    """
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Fleet weights must sum to a positive number")
+    shares = {p: num_agents * w / total for p, w in weights.items()}
+    counts = {p: int(share) for p, share in shares.items()}
+    remaining = num_agents - sum(counts.values())
+    for p in sorted(shares, key=lambda p: shares[p] - counts[p], reverse=True)[:remaining]:
+        counts[p] += 1
+
+    providers = []
+    while len(providers) < num_agents:
+        for p in weights:
+            if counts[p] > 0:
+                providers.append(p)
+                counts[p] -= 1
+    return providers
+
+def print_provider_summary(provider_of, stats, total_time):
+    """Print per-provider throughput and success rates."""
+    print(f"\nPer-provider summary:")
+    print(f"  {'provider':<16}{'agents':>8}{'done':>8}{'solved':>8}{'failed':>8}{'success':>10}{'agents/h':>10}{'avg time':>10}")
+    for provider, n in Counter(provider_of).items():
+        st = stats[provider]
+        success = st['solved'] / st['completed'] * 100 if st['completed'] else 0.0
+        throughput = st['completed'] / total_time * 3600 if total_time > 0 else 0.0
+        avg_time = st['busy_time'] / st['completed'] if st['completed'] else 0.0
+        print(f"  {provider:<16}{n:>8}{st['completed']:>8}{st['solved']:>8}{st['failed']:>8}"
+              f"{success:>9.1f}%{throughput:>10.1f}{avg_time:>9.0f}s")
+
 def print_status(agent_id, status, stdout="", stderr=""):
-    """Print status information for an agent."""
+    """Print status information for an agent, with the last lines of its output."""
     print(f"[Agent {agent_id:02d}] {status}")
     if stdout.strip():
-        print(f"[Agent {agent_id:02d}] STDOUT: {stdout.strip()}")
+        print(f"[Agent {agent_id:02d}] STDOUT (tail): {stdout.strip()}")
     if stderr.strip():
-        print(f"[Agent {agent_id:02d}] STDERR: {stderr.strip()}")
+        print(f"[Agent {agent_id:02d}] STDERR (tail): {stderr.strip()}")
 
 def main():
     parser = argparse.ArgumentParser(description='Run multiple IMO agent instances in parallel')
@@ -164,22 +437,103 @@ def main():
                        help='Path to the agent file to run (default: agent.py)')
     parser.add_argument('--exit-immediately', '-e', action='store_true',
                        help='Exit immediately when solution is found (default: graceful shutdown)')
+    parser.add_argument('--fleet', '-f', type=str, default=None,
+                       help='Mix providers in proportions, e.g. "gemini=0.5,gpt5=0.3,grok4=0.2" '
+                            f'(providers: {", ".join(PROVIDERS)}, or an agent file path; overrides --agent-file)')
+    parser.add_argument('--provider-limit', type=str, default=None,
+                       help='Maximum concurrent agents per provider, e.g. "gemini=8,gpt5=4"')
+    parser.add_argument('--provider-rate', type=str, default=None,
+                       help='Maximum agent launches per minute per provider, e.g. "grok4=2"')
+    parser.add_argument('--cancel-on-solution', '-c', action='store_true',
+                       help='Cancel the remaining agents when a solution is found, but wait for them to stop '
+                            'and print the full summary (default: run all agents to completion)')
+    parser.add_argument('--resume', '-r', action='store_true',
+                       help='Resume an interrupted run in --log-dir: skip finished agents and resume the others '
+                            'from their memory files')
+    parser.add_argument('--cancel-grace', type=float, default=60,
+                       help='Seconds cancelled agents get to stop cleanly before being killed (default: 60)')
+    parser.add_argument('--store', type=str, default=None,
+                       help='SQLite database shared by all agents to record runs, calls, solutions and verdicts')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], default=None,
+                       help='Compress the agent log and memory files (zstd needs the zstandard package)')
+    parser.add_argument('--artifacts', type=str, default=None,
+                       help='Solution artifact store directory shared by all agents')
+    parser.add_argument('--spool', action='store_true',
+                       help='Let GPT-5 agents stream their responses into agent_XX.spool (see spool.py)')
+    parser.add_argument('--warm-start', action='store_true',
+                       help='Start the agents from the best solutions stored in --artifacts instead of from scratch')
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default=None,
+                       help='Log level of the agents (default: the agents\' default, debug)')
+    parser.add_argument('--trace-agents', type=str, default=None,
+                       help='Comma-separated agent IDs that log at trace level whatever --log-level says')
+    parser.add_argument('--child-output', choices=CHILD_OUTPUTS, default='discard',
+                       help='Discard the console output of the agents (it duplicates their logs), or append it to '
+                            'agent_XX.out/.err in --log-dir (default: discard)')
+    parser.add_argument('--output-tail', type=int, default=OUTPUT_TAIL,
+                       help=f'Last lines of each agent\'s stdout and stderr shown in its status report (default: {OUTPUT_TAIL})')
+    parser.add_argument('--events', action='store_true',
+                       help='Let the agents write event logs (agent_XX.events.jsonl) and follow them, reporting passed '
+                            'verifications and acting on a solution as soon as it is accepted, before its agent exits')
+    parser.add_argument('--log-max-bytes', type=parse_size, default=None,
+                       help='Cap the log of each agent at about this size (e.g. 200M), keeping its head, its tail and '
+                            'the final solution')
+    parser.add_argument('--disk-budget', type=parse_size, default=None,
+                       help='Disk space the whole run may use in --log-dir (e.g. 20G). Agent logs are capped at a share '
+                            'of it, and the agents are cancelled if the directory grows past it anyway')
     
     
     args = parser.parse_args()
+
+    if args.warm_start and not args.artifacts:
+        parser.error("--warm-start requires --artifacts")
+    trace_agents = {int(i) for i in args.trace_agents.split(',')} if args.trace_agents else set()
+
+    if args.fleet:
+        fleet = parse_provider_map(args.fleet, float)
+        provider_of = assign_providers(args.num_agents, fleet)
+    else:
+        provider_of = [args.agent_file] * args.num_agents
+    fleet_state = load_fleet_state(args.log_dir) if args.resume else None
+    if fleet_state:
+        # Keep the agent/provider assignment of the interrupted run
+        provider_of = fleet_state["provider_of"]
+        args.num_agents = len(provider_of)
+    elif args.resume:
+        print(f"No fleet state found in {args.log_dir}, starting a new run")
+    mixed_fleet = bool(args.fleet) or len(set(provider_of)) > 1
+    provider_limits = parse_provider_map(args.provider_limit, int)
+    provider_rates = parse_provider_map(args.provider_rate, float)
     
     # Create log directory if it doesn't exist
     os.makedirs(args.log_dir, exist_ok=True)
+    # A cancel file left over from a previous run would stop every agent at once
+    if os.path.exists(cancel_file_path(args.log_dir)):
+        os.remove(cancel_file_path(args.log_dir))
     
     print(f"Starting {args.num_agents} parallel agents...")
     print(f"Problem file: {args.problem_file}")
-    print(f"Agent file: {args.agent_file}")
+    if mixed_fleet:
+        for provider, n in Counter(provider_of).items():
+            limit = provider_limits.get(provider)
+            rate = provider_rates.get(provider)
+            print(f"Provider {provider}: {n} agents ({provider_agent_file(provider)})"
+                  f"{f', max {limit} concurrent' if limit else ''}{f', max {rate:g} launches/min' if rate else ''}")
+    else:
+        print(f"Agent file: {provider_agent_file(provider_of[0])}")
     print(f"Log directory: {args.log_dir}")
     print(f"Exit behavior: {'Immediate exit' if args.exit_immediately else 'Run all agents to completion'} when solution found")
     if args.timeout:
         print(f"Timeout per agent: {args.timeout} seconds")
-    print(f"Max workers: {args.max_workers or args.num_agents}")
-    if not args.exit_immediately:
+    max_workers = args.max_workers or args.num_agents
+    print(f"Max workers: {max_workers}")
+    log_max_bytes = log_max_bytes_for(args.num_agents, args.log_max_bytes, args.disk_budget)
+    if args.disk_budget:
+        print(f"Disk budget: {args.disk_budget} bytes, agent logs capped at {log_max_bytes} bytes")
+    elif log_max_bytes:
+        print(f"Agent logs capped at {log_max_bytes} bytes")
+    if args.cancel_on_solution and not args.exit_immediately:
+        print("Note: Remaining agents will be cancelled once a solution is found")
+    elif not args.exit_immediately:
         print("Note: All agents will run to completion regardless of solution found")
     print("-" * 50)
     
@@ -187,93 +541,270 @@ def main():
     completed_agents = []
     successful_agents = []
     failed_agents = []
+    cancelled_agents = []
+    saved_tokens = 0
     solution_found = False
     solution_agent_id = None
 
     other_prompts = []
     if args.other_prompts:
         other_prompts = args.other_prompts.split(',')
+
+    # Statuses: pending, running, solved, completed, failed, cancelled
+    if fleet_state is None:
+        fleet_state = {
+            "problem_file": args.problem_file,
+            "provider_of": provider_of,
+            "agents": {str(i): {"status": "pending"} for i in range(args.num_agents)},
+        }
+    pending_agents = []
+    resume_agents = set()
+    for i in range(args.num_agents):
+        status = fleet_state["agents"][str(i)]["status"]
+        if status == "solved":
+            completed_agents.append(i)
+            successful_agents.append(i)
+            if not solution_found:
+                solution_found = True
+                solution_agent_id = i
+        elif status == "completed":
+            completed_agents.append(i)
+            successful_agents.append(i)
+        else:
+            pending_agents.append(i)
+            if status != "pending":
+                resume_agents.add(i)
+    if args.resume and completed_agents:
+        print(f"Resuming: {len(completed_agents)} agents already finished, "
+              f"{len(resume_agents)} resumed from their memory files, "
+              f"{len(pending_agents) - len(resume_agents)} not started yet")
+        if solution_found:
+            print(f"Agent {solution_agent_id:02d} had already found a solution")
+            if args.exit_immediately or args.cancel_on_solution:
+                pending_agents = []
+    save_fleet_state(args.log_dir, fleet_state)
     
     start_time = time.time()
     
+    provider_stats = {p: {'completed': 0, 'solved': 0, 'failed': 0, 'busy_time': 0.0} for p in set(provider_of)}
+    provider_running = Counter()
+    next_launch = {}
+    launch_time = {}
+    # Follows the agents' event logs (--events); without it, solutions are only seen when agents exit
+    event_tail = EventTail() if args.events else None
+    next_disk_check = 0.0
+    over_budget = False
+
+    def can_launch(provider, now):
+        limit = provider_limits.get(provider)
+        if limit and provider_running[provider] >= limit:
+            return False
+        return now >= next_launch.get(provider, 0)
+
     try:
-        with ProcessPoolExecutor(max_workers=args.max_workers or args.num_agents) as executor:
-            # Submit all agent tasks
-            future_to_agent = {
-                executor.submit(run_agent, i, args.problem_file, args.log_dir, args.timeout, other_prompts, args.agent_file): i 
-                for i in range(args.num_agents)
-            }
-            
-            # Process completed agents
-            for future in as_completed(future_to_agent):
-                agent_id, return_code, stdout, stderr, found_solution = future.result()
-                completed_agents.append(agent_id)
-                
-                if found_solution:
-                    solution_found = True
-                    solution_agent_id = agent_id
-                    status = "FOUND CORRECT SOLUTION!"
-                    successful_agents.append(agent_id)
-                    print(f"\n🎉 SOLUTION FOUND by Agent {agent_id:02d}! 🎉")
-                    print(f"[Agent {agent_id:02d}] {status}")
-                    print_status(agent_id, status, stdout, stderr)
-                    
-                    if args.exit_immediately:
-                        # Exit immediately when solution is found
-                        print(f"\nExiting immediately as requested...")
-                        # Cancel pending tasks and stop scheduling new ones
-                        try:
-                            executor.shutdown(wait=False, cancel_futures=True)
-                        except Exception:
-                            pass
-                        # Print a concise early-exit summary with the winning agent
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            future_to_agent = {}
+
+            def exit_immediately(agent_id):
+                """Cancel every other agent and exit once agent_id has found a solution."""
+                nonlocal saved_tokens
+                print(f"\nExiting immediately as requested...")
+                # Taken before the shutdown, which drops the executor's references to its workers
+                worker_processes = list((getattr(executor, "_processes", None) or {}).values())
+                # Cancel pending tasks and stop scheduling new ones
+                try:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                except Exception:
+                    pass
+                # Ask running agents to abandon their requests and stop, then give them a grace period
+                # (also the winner, when its solution was signalled by an event before it exited)
+                stopped, still_running = set(), set(future_to_agent)
+                try:
+                    cancel_agents(args.log_dir)
+                    stopped, still_running = wait(future_to_agent, timeout=args.cancel_grace)
+                except Exception:
+                    pass
+                stopped = {f for f in stopped if future_to_agent[f] != agent_id}
+                # Queued agents cancelled by the shutdown never started
+                never_started = {f for f in stopped if f.cancelled()}
+                stopped -= never_started
+                for f in stopped:
+                    if f.exception() is None:
+                        saved_tokens += tokens_saved(f.result()[2])
+                # Print a concise early-exit summary with the winning agent
+                elapsed = time.time() - start_time
+                print("\n" + "=" * 50)
+                print("EARLY EXIT SUMMARY")
+                print("=" * 50)
+                print(f"Correct solution found by Agent {agent_id:02d}")
+                print(f"Log file: {agent_log_path(args.log_dir, agent_id)}")
+                print(f"Elapsed time: {elapsed:.2f} seconds")
+                print(f"Agents cancelled: {len(stopped)} stopped cleanly, {len(still_running)} killed, "
+                      f"{len(never_started) + len(pending_agents)} never started")
+                print(f"Estimated output tokens saved by cancelling: {saved_tokens}")
+                # Terminate all worker processes so they forward termination to their child agents
+                try:
+                    for p in worker_processes:
                         try:
-                            elapsed = time.time() - start_time
-                            print("\n" + "=" * 50)
-                            print("EARLY EXIT SUMMARY")
-                            print("=" * 50)
-                            print(f"Correct solution found by Agent {agent_id:02d}")
-                            print(f"Log file: {os.path.join(args.log_dir, f'agent_{agent_id:02d}.log')}")
-                            print(f"Elapsed time: {elapsed:.2f} seconds")
+                            p.terminate()
                         except Exception:
-                            pass
-                        # Terminate all worker processes so they forward termination to their child agents
+                            try:
+                                os.kill(p.pid, signal.SIGTERM)
+                            except Exception:
+                                pass
+                    # Brief grace period, then force kill remaining
+                    time.sleep(0.5)
+                    for p in worker_processes:
                         try:
-                            worker_processes = list(getattr(executor, "_processes", {}).values())
-                            for p in worker_processes:
-                                try:
-                                    p.terminate()
-                                except Exception:
-                                    try:
-                                        os.kill(p.pid, signal.SIGTERM)
-                                    except Exception:
-                                        pass
-                            # Brief grace period, then force kill remaining
-                            time.sleep(0.5)
-                            for p in worker_processes:
-                                try:
-                                    if hasattr(p, "is_alive") and p.is_alive():
-                                        p.kill()
-                                except Exception:
-                                    try:
-                                        os.kill(p.pid, signal.SIGKILL)
-                                    except Exception:
-                                        pass
+                            if hasattr(p, "is_alive") and p.is_alive():
+                                p.kill()
                         except Exception:
-                            pass
-                        # Exit the main process immediately without waiting for context cleanup
-                        os._exit(0)
-                    # Otherwise, continue running all agents to completion
-                elif return_code == 0:
-                    status = "COMPLETED SUCCESSFULLY (no solution found)"
-                    successful_agents.append(agent_id)
-                else:
-                    status = f"FAILED (return code: {return_code})"
-                    failed_agents.append(agent_id)
+                            try:
+                                os.kill(p.pid, signal.SIGKILL)
+                            except Exception:
+                                pass
+                except Exception:
+                    pass
+                # Exit the main process immediately without waiting for context cleanup
+                os._exit(0)
+
+            def on_event(agent_id, event):
+                """React to an event of a running agent as soon as it is written."""
+                nonlocal solution_found, solution_agent_id
+                kind = event.get("event")
+                if kind == "iteration":
+                    fleet_state["agents"][str(agent_id)].update(
+                        run=event.get("run"), iteration=event.get("iteration"),
+                        correct_count=event.get("correct_count"), error_count=event.get("error_count"))
+                elif kind == "verdict" and event.get("passed"):
+                    iteration = event.get("iteration")
+                    where = f"iteration {iteration}" if iteration is not None else "initial verification"
+                    print(f"[Agent {agent_id:02d}] Verification passed (run {event.get('run')}, {where})")
+                elif kind == "solution":
+                    fleet_state["agents"][str(agent_id)]["solution_hash"] = event.get("solution_hash")
+                    print(f"\n🎉 SOLUTION ACCEPTED by Agent {agent_id:02d} (run {event.get('run')})! 🎉")
+                    if not solution_found:
+                        solution_found = True
+                        solution_agent_id = agent_id
+                    if args.exit_immediately:
+                        save_fleet_state(args.log_dir, fleet_state)
+                        exit_immediately(agent_id)
+                    elif args.cancel_on_solution and not os.path.exists(cancel_file_path(args.log_dir)):
+                        print(f"\nCancelling the remaining agents...")
+                        cancel_agents(args.log_dir)
+                        pending_agents.clear()
+
+            while pending_agents or future_to_agent:
+                # Launch every pending agent whose provider has free capacity
+                now = time.time()
+                launched = False
+                for i in list(pending_agents):
+                    if len(future_to_agent) >= max_workers:
+                        break
+                    provider = provider_of[i]
+                    if not can_launch(provider, now):
+                        continue
+                    future = executor.submit(run_agent, i, args.problem_file, args.log_dir, args.timeout,
+                                             other_prompts, provider_agent_file(provider), i in resume_agents, args.store,
+                                             args.compress, args.artifacts, args.warm_start, args.spool,
+                                             "trace" if i in trace_agents else args.log_level,
+                                             args.child_output, args.output_tail, args.events, log_max_bytes)
+                    future_to_agent[future] = i
+                    if event_tail is not None:
+                        event_tail.follow(i, events_path(args.log_dir, i))
+                    fleet_state["agents"][str(i)]["status"] = "running"
+                    launched = True
+                    pending_agents.remove(i)
+                    launch_time[i] = now
+                    provider_running[provider] += 1
+                    if provider in provider_rates:
+                        next_launch[provider] = now + 60.0 / provider_rates[provider]
+                if launched:
+                    save_fleet_state(args.log_dir, fleet_state)
+
+                if not future_to_agent:
+                    # Everything left is waiting for its provider's rate limit
+                    time.sleep(0.5)
+                    continue
+
+                polling = pending_agents or event_tail is not None or args.disk_budget
+                done, _ = wait(future_to_agent, timeout=1.0 if polling else None, return_when=FIRST_COMPLETED)
+                if args.disk_budget and not over_budget and time.time() >= next_disk_check:
+                    # The log caps bound each agent; this bounds whatever else grows (events, memory, spools)
+                    next_disk_check = time.time() + DISK_CHECK_INTERVAL
+                    used = disk_usage(args.log_dir)
+                    if used > args.disk_budget:
+                        over_budget = True
+                        print(f"\nDisk budget exceeded: {used} of {args.disk_budget} bytes used in {args.log_dir}; "
+                              f"cancelling the agents...")
+                        cancel_agents(args.log_dir)
+                        pending_agents.clear()
+                if event_tail is not None:
+                    # Events first: a solution is acted on before its agent has even exited
+                    events = list(event_tail.poll())
+                    for agent_id, event in events:
+                        on_event(agent_id, event)
+                    if events:
+                        save_fleet_state(args.log_dir, fleet_state)
+                for future in done:
+                    future_to_agent.pop(future)
+                    agent_id, return_code, stdout, stderr, found_solution = future.result()
+                    if event_tail is not None:
+                        for _, event in event_tail.unfollow(agent_id):
+                            on_event(agent_id, event)
+                    completed_agents.append(agent_id)
+                    provider = provider_of[agent_id]
+                    provider_running[provider] -= 1
+                    st = provider_stats[provider]
+                    st['completed'] += 1
+                    st['busy_time'] += time.time() - launch_time[agent_id]
+                    if found_solution:
+                        st['solved'] += 1
+                    elif return_code not in (0, EXIT_CANCELLED):
+                        st['failed'] += 1
+                    # Record the outcome before anything else so an interruption cannot lose it
+                    if found_solution:
+                        agent_status = "solved"
+                    elif return_code == 0:
+                        agent_status = "completed"
+                    elif return_code == EXIT_CANCELLED:
+                        agent_status = "cancelled"
+                    else:
+                        agent_status = "failed"
+                    fleet_state["agents"][str(agent_id)].update(status=agent_status, return_code=return_code)
+                    save_fleet_state(args.log_dir, fleet_state)
+
+                    if found_solution:
+                        if not solution_found:
+                            solution_found = True
+                            solution_agent_id = agent_id
+                        status = "FOUND CORRECT SOLUTION!"
+                        successful_agents.append(agent_id)
+                        print(f"\n🎉 SOLUTION FOUND by Agent {agent_id:02d}! 🎉")
+                        print(f"[Agent {agent_id:02d}] {status}")
+                        print_status(agent_id, status, stdout, stderr)
+                    
+                        if args.exit_immediately:
+                            exit_immediately(agent_id)
+                        elif args.cancel_on_solution and not os.path.exists(cancel_file_path(args.log_dir)):
+                            print(f"\nCancelling the remaining agents...")
+                            cancel_agents(args.log_dir)
+                            pending_agents.clear()
+                        # Otherwise, continue running all agents to completion
+                    elif return_code == EXIT_CANCELLED:
+                        status = "CANCELLED"
+                        cancelled_agents.append(agent_id)
+                        saved_tokens += tokens_saved(stdout)
+                    elif return_code == 0:
+                        status = "COMPLETED SUCCESSFULLY (no solution found)"
+                        successful_agents.append(agent_id)
+                    else:
+                        status = f"FAILED (return code: {return_code})"
+                        failed_agents.append(agent_id)
                 
-                print_status(agent_id, status, stdout, stderr)
-                print(f"Progress: {len(completed_agents)}/{args.num_agents} agents completed")
-                print("-" * 30)
+                    print_status(agent_id, status, stdout, stderr)
+                    print(f"Progress: {len(completed_agents)}/{args.num_agents} agents completed")
+                    print("-" * 30)
     
     except KeyboardInterrupt:
         print("\nReceived interrupt signal. Shutting down gracefully...")
@@ -290,28 +821,27 @@ def main():
     print(f"Total agents: {args.num_agents}")
     print(f"Successful agents: {len(successful_agents)}")
     print(f"Failed agents: {len(failed_agents)}")
+    if cancelled_agents:
+        print(f"Cancelled agents: {len(cancelled_agents)}")
+        print(f"Estimated output tokens saved by cancelling: {saved_tokens}")
     print(f"Success rate: {len(successful_agents)/args.num_agents*100:.1f}%")
+    if mixed_fleet:
+        print_provider_summary(provider_of, provider_stats, total_time)
     
     if solution_found:
         print(f"\n🎉 SOLUTION FOUND by Agent {solution_agent_id:02d}! 🎉")
-        print(f"Log file with solution: {os.path.join(args.log_dir, f'agent_{solution_agent_id:02d}.log')}")
+        print(f"Log file with solution: {agent_log_path(args.log_dir, solution_agent_id)}")
         
         # Try to extract and display the solution
-        solution_log_file = os.path.join(args.log_dir, f"agent_{solution_agent_id:02d}.log")
+        solution_log_file = agent_log_path(args.log_dir, solution_agent_id)
         try:
-            with open(solution_log_file, 'r', encoding='utf-8') as f:
-                log_content = f.read()
-                # Look for the solution in the log
-                if "Found a correct solution in run" in log_content:
-                    # Extract the solution JSON
-                    solution_match = re.search(r'Found a correct solution in run \d+\.\s*\n(.*?)(?=\n\n|\n>>>>>>>|\Z)', 
-                                            log_content, re.DOTALL)
-                    if solution_match:
-                        solution_text = solution_match.group(1).strip()
-                        print(f"\nSOLUTION FOUND:")
-                        print("=" * 50)
-                        print(solution_text)
-                        print("=" * 50)
+            # Seeks to the solution through the log index instead of reading the whole log
+            solution_text = find_solution(solution_log_file)
+            if solution_text is not None:
+                print(f"\nSOLUTION FOUND:")
+                print("=" * 50)
+                print(solution_text)
+                print("=" * 50)
         except Exception as e:
             print(f"Could not extract solution from log file: {e}")
     
@@ -324,7 +854,7 @@ def main():
     print(f"\nLog files are available in: {os.path.abspath(args.log_dir)}")
     
     # List log files
-    log_files = [f for f in os.listdir(args.log_dir) if f.endswith('.log')]
+    log_files = [f for f in os.listdir(args.log_dir) if f.endswith(('.log', '.log.gz', '.log.zst'))]
     if log_files:
         print(f"\nGenerated log files:")
         for log_file in sorted(log_files):
@@ -0,0 +1,191 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Embedded SQLite store for agent runs.
+
+Agents write one row per run, iteration, API call, distinct solution and
+verdict. The database runs in WAL mode and rows are buffered and inserted in
+batches, so hundreds of agents can share one file. Example queries:
+
+    -- which iteration passed verification, and when
+    SELECT run_id, iteration, finished FROM iterations WHERE verdict = 'yes';
+    -- how long verification takes
+    SELECT AVG(latency), MAX(latency) FROM calls WHERE phase = 'verify';
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+
+from artifacts import count_findings, text_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent TEXT NOT NULL,
+    model TEXT NOT NULL,
+    problem_hash TEXT NOT NULL,
+    run_index INTEGER NOT NULL,
+    log_file TEXT,
+    started REAL NOT NULL,
+    finished REAL,
+    status TEXT NOT NULL DEFAULT 'running',
+    solved INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS iterations (
+    run_id INTEGER NOT NULL,
+    iteration INTEGER NOT NULL,
+    correct_count INTEGER NOT NULL,
+    error_count INTEGER NOT NULL,
+    verdict TEXT,
+    solution_hash TEXT,
+    finished REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    run_id INTEGER,
+    phase TEXT,
+    started REAL NOT NULL,
+    latency REAL NOT NULL,
+    request_bytes INTEGER,
+    response_bytes INTEGER,
+    output_tokens INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS solutions (
+    hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    first_run_id INTEGER,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS verdicts (
+    run_id INTEGER,
+    solution_hash TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    critical_errors INTEGER NOT NULL,
+    justification_gaps INTEGER NOT NULL,
+    bug_report TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_problem ON runs (problem_hash, solved);
+CREATE INDEX IF NOT EXISTS iterations_run ON iterations (run_id, iteration);
+CREATE INDEX IF NOT EXISTS calls_run ON calls (run_id, phase);
+CREATE INDEX IF NOT EXISTS verdicts_solution ON verdicts (solution_hash);
+CREATE INDEX IF NOT EXISTS verdicts_run ON verdicts (run_id);
+"""
+
+class RunStore:
+    """
+    Writer used by one agent process. Rows are buffered per table and
+    flushed in a single transaction every batch_size rows, every
+    flush_interval seconds, at the end of each run and at exit.
+    """
+    def __init__(self, path, agent, model, log_file=None, batch_size=50, flush_interval=10.0):
+        self.path = path
+        self.agent = agent
+        self.model = model
+        self.log_file = log_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.run_id = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_rows = 0
+        self._last_flush = time.time()
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        atexit.register(self.close)
+
+    def _queue(self, sql, row):
+        with self._lock:
+            self._pending.setdefault(sql, []).append(row)
+            self._pending_rows += 1
+            due = self._pending_rows >= self.batch_size or time.time() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending, self._pending_rows = self._pending, {}, 0
+            self._last_flush = time.time()
+            if not pending or self._conn is None:
+                return
+            self._conn.execute("BEGIN")
+            try:
+                for sql, rows in pending.items():
+                    self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def start_run(self, problem_statement, run_index):
+        """Insert the run row right away so its id can be referenced."""
+        self.flush()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO runs (agent, model, problem_hash, run_index, log_file, started) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.agent, self.model, text_hash(problem_statement), run_index, self.log_file, time.time()))
+            self.run_id = cur.lastrowid
+        return self.run_id
+
+    def end_run(self, status, solved=False):
+        self._queue("UPDATE runs SET finished = ?, status = ?, solved = ? WHERE id = ?",
+                    (time.time(), status, int(solved), self.run_id))
+        self.flush()
+
+    def record_call(self, phase, started, latency, request_bytes, response_bytes, output_tokens=None, error=None):
+        self._queue(
+            "INSERT INTO calls (run_id, phase, started, latency, request_bytes, response_bytes, output_tokens, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, phase, started, latency, request_bytes, response_bytes, output_tokens, error))
+
+    def record_verdict(self, solution, verdict, bug_report):
+        """Store the solution text once and the verdict it received."""
+        h = text_hash(solution)
+        critical, gaps = count_findings(bug_report)
+        now = time.time()
+        self._queue("INSERT OR IGNORE INTO solutions (hash, text, first_run_id, created) VALUES (?, ?, ?, ?)",
+                    (h, solution, self.run_id, now))
+        self._queue(
+            "INSERT INTO verdicts (run_id, solution_hash, verdict, passed, critical_errors, justification_gaps, bug_report, created) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, h, verdict.strip(), int("yes" in verdict.lower()), critical, gaps, bug_report, now))
+
+    def record_iteration(self, iteration, correct_count, error_count, verdict, solution):
+        self._queue(
+            "INSERT INTO iterations (run_id, iteration, correct_count, error_count, verdict, solution_hash, finished) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, iteration, correct_count, error_count, (verdict or "").strip(), text_hash(solution), time.time()))
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
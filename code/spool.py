@@ -0,0 +1,233 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Spool directory for streamed API calls.
+
+While a call streams, its output text is appended to <id>.partial and its
+progress (characters and events received, last event) to <id>.json. When
+the call completes, the full response is written atomically to <id>.done
+and the in-flight files are removed. Completed responses stay in the spool
+until the agent's next memory checkpoint covers them, so an agent resumed
+after a crash reuses them instead of sending the same requests again. An
+agent without a memory file keeps no completed responses, and an agent that
+is not resuming starts from an empty spool.
+
+Running this file prints the state of the spools below a directory:
+
+    python spool.py logs/p1_run
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+def payload_key(payload):
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+
+class SpoolCall:
+    """One streamed call: event() for each stream event, then finish() or abort()."""
+    def __init__(self, spool, call_id, key, phase, progress_interval):
+        self.spool = spool
+        self.id = call_id
+        self.key = key
+        self.base = os.path.join(spool.root, call_id)
+        self.progress_interval = progress_interval
+        self.meta = {"key": key, "phase": phase, "pid": os.getpid(), "started": time.time(),
+                     "updated": time.time(), "chars": 0, "events": 0, "last_event": None}
+        self._partial = open(self.base + ".partial", 'w', encoding='utf-8')
+        self._last_progress = 0.0
+        self._update(force=True)
+
+    def _update(self, force=False):
+        now = time.time()
+        if force or now - self._last_progress >= self.progress_interval:
+            self.meta["updated"] = now
+            _write_json(self.base + ".json", self.meta)
+            self._last_progress = now
+
+    def event(self, event_type, text=None):
+        """Record a stream event, appending its output text if any."""
+        self.meta["events"] += 1
+        self.meta["last_event"] = event_type
+        if text:
+            self._partial.write(text)
+            self._partial.flush()
+            self.meta["chars"] += len(text)
+        self._update()
+
+    def _cleanup(self):
+        self._partial.close()
+        for ext in (".partial", ".json"):
+            try:
+                os.remove(self.base + ext)
+            except FileNotFoundError:
+                pass
+
+    def finish(self, response):
+        """Persist the complete response (if a checkpoint will cover it), then drop the in-flight files."""
+        if self.spool.checkpoints:
+            _write_json(self.base + ".done", {"key": self.key, "response": response, "finished": time.time()})
+            with self.spool._lock:
+                self.spool._completed.append(self.base + ".done")
+        self._cleanup()
+
+    def abort(self):
+        self._cleanup()
+
+class Spool:
+    """
+    Spool of one agent. With resume, the completed responses left by the
+    previous process are served again (once each); otherwise the directory is
+    cleared. checkpoints tells whether the agent saves memory checkpoints:
+    without them no completed response is kept.
+    """
+    def __init__(self, root, progress_interval=2.0, resume=False, checkpoints=True):
+        self.root = root
+        self.progress_interval = progress_interval
+        self.checkpoints = checkpoints
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._completed = []
+        self._recovered = {}
+        os.makedirs(root, exist_ok=True)
+
+        # Completed responses of a previous process, served once each
+        self.discarded_chars = 0
+        for name in sorted(os.listdir(root)):
+            path = os.path.join(root, name)
+            if name.endswith(".done"):
+                if not resume:
+                    # Left by an earlier run: its answers must not be served to this one
+                    os.remove(path)
+                    continue
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                self._recovered.setdefault(entry["key"], []).append((path, entry["response"]))
+            elif name.endswith(".partial"):
+                # Interrupted generation of a previous process: nothing reusable
+                self.discarded_chars += os.path.getsize(path)
+                os.remove(path)
+            elif name.endswith(".json") or name.endswith(".tmp"):
+                os.remove(path)
+
+    @property
+    def recoverable(self):
+        return sum(len(v) for v in self._recovered.values())
+
+    def recover(self, payload):
+        """Return a completed response for payload left by a previous process, or None."""
+        with self._lock:
+            entries = self._recovered.get(payload_key(payload))
+            if not entries:
+                return None
+            path, response = entries.pop(0)
+            if self.checkpoints:
+                self._completed.append(path)
+        if not self.checkpoints:
+            os.remove(path)
+        return response
+
+    def begin(self, payload, phase=None):
+        call_id = f"{os.getpid()}-{next(self._ids):04d}"
+        return SpoolCall(self, call_id, payload_key(payload), phase, self.progress_interval)
+
+    def checkpoint(self):
+        """
+        The agent state now covers every completed response: remove them
+        (recovered ones that were not needed again are kept).
+        """
+        with self._lock:
+            completed, self._completed = self._completed, []
+        for path in completed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def spool_status(root):
+    """In-flight and completed calls of one spool directory."""
+    calls = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if name.endswith(".json") and not name.endswith(".tmp"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            meta["id"] = name[:-len(".json")]
+            meta["state"] = "streaming" if _pid_alive(meta["pid"]) else "interrupted"
+            # The partial output is more current than the throttled progress record
+            try:
+                meta["chars"] = max(meta["chars"], os.path.getsize(path[:-len(".json")] + ".partial"))
+            except OSError:
+                pass
+            calls.append(meta)
+        elif name.endswith(".done"):
+            calls.append({"id": name[:-len(".done")], "state": "completed", "updated": os.path.getmtime(path)})
+    return calls
+
+if __name__ == "__main__":
+    top = sys.argv[1] if len(sys.argv) > 1 else "."
+    spools = [root for root, _, files in os.walk(top)
+              if any(f.endswith((".partial", ".done")) for f in files) or root.endswith(".spool")]
+    if not spools:
+        print(f"No spooled calls below {top}")
+        sys.exit(0)
+    now = time.time()
+    for root in sorted(spools):
+        print(root)
+        for call in spool_status(root):
+            if call["state"] == "completed":
+                print(f"  {call['id']}  completed, waiting for the next checkpoint")
+            else:
+                print(f"  {call['id']}  {call['state']}  phase: {call.get('phase')}  "
+                      f"running {now - call['started']:.0f}s  {call['chars']} chars  {call['events']} events  "
+                      f"last: {call['last_event']} ({now - call['updated']:.0f}s ago)")
@@ -0,0 +1,398 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Export the conversations of agent logs as a dataset of turns, one JSON line
+per message:
+
+    {"source": "run_logs_gpt5/solution_p1_gpt5.log", "run": 0, "iteration": 2, "call": 9,
+     "phase": "verify", "turn": 1, "kind": "response", "role": "assistant",
+     "t": 1754985141.0, "hash": "4be1f0c2a9e07d35", "chars": 9120, "text": "..."}
+
+The request turns of a call (kind "request": system prompt, user prompts and
+earlier answers sent back to the model) are followed by its response turn.
+
+Text logs are parsed section by section in one streaming pass: the request
+payloads that were logged (all of them in older logs, with --log-bodies or
+--log-level trace in newer ones) give the system and user turns, the raw
+responses or the extracted solutions and verification logs give the
+assistant turns. Event logs written with --log-bodies give exact request and
+response pairs. Blob references (--intern-blobs) are expanded.
+
+The dataset is indexed like a log (<dataset>.idx, one entry per call), so
+the turns of a source, run or phase are read without scanning the dataset:
+
+    python transcripts.py export run_logs run_logs_gpt5 run_logs_grok4 -o turns.jsonl
+    python transcripts.py list turns.jsonl
+    python transcripts.py query turns.jsonl --phase verify --role assistant
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from blobs import blob_path, expand, load_blobs
+from compress import SUFFIXES, detect, open_text, read_bytes
+from events import body_hash
+from log_index import LogIndexWriter, read_index
+from log_stats import START_MARKERS, timestamp_seconds
+
+# Sections whose body is what the model answered, when the raw response was not logged
+ANSWER_MARKERS = {"First solution:", "Corrected solution:", "Verification results:", "Is verification good?"}
+
+def _strip_compression(name):
+    for suffix in SUFFIXES.values():
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def payload_messages(payload):
+    """(role, text) of the messages of a request payload of any of the agents."""
+    if not isinstance(payload, dict):
+        return
+    if "contents" in payload:
+        # Gemini
+        system = payload.get("systemInstruction")
+        if system:
+            yield "system", ''.join(part.get("text", "") for part in system.get("parts", []))
+        for content in payload["contents"]:
+            role = content.get("role", "user")
+            yield "assistant" if role == "model" else role, ''.join(part.get("text", "") for part in content.get("parts", []))
+    elif "messages" in payload:
+        # XAI
+        for message in payload["messages"]:
+            yield message.get("role", "user"), message.get("content") or ""
+    elif "input" in payload:
+        # OpenAI: the whole conversation is one input text
+        if isinstance(payload["input"], str):
+            yield "user", payload["input"]
+        else:
+            for message in payload["input"]:
+                yield message.get("role", "user"), message.get("content") or ""
+
+def response_text(response):
+    """Text answered in a raw API response of any of the agents, or None."""
+    if not isinstance(response, dict):
+        return None
+    try:
+        if "candidates" in response:
+            return ''.join(part.get("text", "") for part in response["candidates"][0]["content"]["parts"])
+        if "choices" in response:
+            return response["choices"][0]["message"]["content"]
+        if "output" in response:
+            for item in response["output"]:
+                if item.get("type") == "message":
+                    for content in item.get("content", []):
+                        if content.get("type") == "output_text":
+                            return content["text"]
+            return ""
+    except (KeyError, IndexError, TypeError):
+        return None
+    return None
+
+def _json(text, blobs):
+    if blobs:
+        text = expand(text, blobs)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+class _Conversation:
+    """Numbers the calls and turns of one source."""
+    def __init__(self, source):
+        self.source = source
+        self.run = None
+        self.iteration = None
+        self.call = -1
+        self.phase = None
+        self.turn = 0
+        self.answered = True
+
+    def open(self, phase):
+        self.call += 1
+        self.phase = phase
+        self.turn = 0
+        self.answered = False
+
+    def turn_record(self, role, text, t, response=False):
+        record = {"source": self.source, "run": self.run, "iteration": self.iteration, "call": self.call,
+                  "phase": self.phase, "turn": self.turn, "kind": "response" if response else "request",
+                  "role": role, "t": t, "hash": body_hash(text), "chars": len(text), "text": text}
+        self.turn += 1
+        if response:
+            self.answered = True
+        return record
+
+    def response(self, text, t):
+        return self.turn_record("assistant", text, t, response=True)
+
+def _log_turns(path, blobs):
+    """Turns of a text log."""
+    conv = _Conversation(path)
+    marker, t, body = None, None, []
+
+    def section():
+        """Turns of the section just read (marker and body)."""
+        if marker is None:
+            return
+        if marker.startswith("Run ") and " of " in marker:
+            try:
+                conv.run = int(marker.split()[1])
+            except ValueError:
+                pass
+            conv.iteration = None
+        elif marker in START_MARKERS:
+            conv.open(START_MARKERS[marker])
+            payload = _json('\n'.join(body), blobs) if body else None
+            for role, text in payload_messages(payload):
+                yield conv.turn_record(role, text, t)
+        elif marker.startswith("Response:"):
+            text = response_text(_json('\n'.join(body), blobs)) if body else None
+            if text is not None and conv.call >= 0:
+                yield conv.response(text, t)
+        elif marker == "Check if solution is complete:":
+            # Logged as is, not as JSON
+            conv.open("check_complete")
+            if body:
+                answer = _json(body[0], blobs)
+                yield conv.response(answer if isinstance(answer, str) else '\n'.join(body).strip(), t)
+        elif marker in ANSWER_MARKERS:
+            answer = _json(body[0], blobs) if body else None
+            if not conv.answered and isinstance(answer, str):
+                yield conv.response(answer, t)
+            if marker == "Verification results:":
+                # The verdict call on the verification log follows
+                conv.open("verdict")
+
+    with open_text(path) as f:
+        try:
+            for line in f:
+                line = line.rstrip('\n')
+                if line.startswith('[') and line[21:27] == ' >>>>>':
+                    next_t, text = timestamp_seconds(line[1:20]), line[22:]
+                elif line.startswith('>>>>>'):
+                    next_t, text = None, line
+                else:
+                    if line.startswith("Number of iterations: "):
+                        try:
+                            conv.iteration = int(line[len("Number of iterations: "):].split(',', 1)[0])
+                        except ValueError:
+                            pass
+                    elif marker is not None:
+                        body.append(line)
+                    continue
+                yield from section()
+                marker, t, body = text.lstrip('>').strip(), next_t, []
+        except EOFError:
+            # Truncated compressed log: keep what was read
+            pass
+    yield from section()
+
+def _event_turns(path, blobs):
+    """Turns of an event log written with --log-bodies."""
+    conv = _Conversation(path)
+    with open_text(path) as f:
+        for line in f:
+            entry = _json(line, blobs)
+            if not isinstance(entry, dict) or entry.get("event") != "call" or "payload" not in entry:
+                continue
+            conv.run, conv.iteration = entry.get("run"), entry.get("iteration")
+            conv.open(entry.get("phase"))
+            sent = entry["t"] - (entry.get("latency") or 0)
+            for role, text in payload_messages(entry["payload"]):
+                yield conv.turn_record(role, text, round(sent, 3))
+            text = response_text(entry.get("response"))
+            if text is not None:
+                yield conv.response(text, entry["t"])
+
+def is_event_log(path):
+    return _strip_compression(path).endswith(".events.jsonl")
+
+def blobs_for(path):
+    """
+    Blobs of a log written with --intern-blobs. The agents name the blob file
+    after the text log, so an event log agent_XX.events.jsonl looks next to
+    agent_XX.log too.
+    """
+    blobs = load_blobs(blob_path(path))
+    if not blobs and is_event_log(path):
+        blobs = load_blobs(blob_path(_strip_compression(path)[:-len(".events.jsonl")] + ".log"))
+    return blobs
+
+def source_turns(path, blobs_file=None):
+    """All turns of a text or event log, in order."""
+    blobs = load_blobs(blobs_file) if blobs_file else blobs_for(path)
+    if is_event_log(path):
+        return _event_turns(path, blobs)
+    return _log_turns(path, blobs)
+
+def write_shard(path, shard, blobs_file=None):
+    """
+    Write the turns of a log to the shard file as JSON lines (run in the
+    process pool). Returns the calls, as (offset in the shard, index fields),
+    the number of turns and the size of the shard.
+    """
+    calls = []
+    key = None
+    offset = turns = 0
+    with open(shard, 'w', encoding='utf-8') as f:
+        for record in source_turns(path, blobs_file):
+            # One index entry per call of each source
+            if (record["source"], record["run"], record["call"]) != key:
+                key = (record["source"], record["run"], record["call"])
+                calls.append((offset, {"source": record["source"], "run": record["run"],
+                                       "call": record["call"], "phase": record["phase"]}))
+            line = json.dumps(record, ensure_ascii=False) + '\n'
+            f.write(line)
+            offset += len(line.encode('utf-8'))
+            turns += 1
+    return calls, turns, offset
+
+def iter_sources(paths):
+    """Logs given directly, and the text and event logs below the directories given."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            for name in sorted(names):
+                if _strip_compression(name).endswith((".log", ".events.jsonl")):
+                    yield os.path.join(root, name)
+
+def export(paths, output, jobs=None, blobs_file=None):
+    """Write the turns of all logs to output, indexed per call. Returns (sources, calls, turns)."""
+    sources = list(iter_sources(paths))
+    jobs = max(1, jobs or os.cpu_count())
+    # Each source is parsed into a shard file next to the output and copied
+    # into it in input order, so no more than a window of sources is pending
+    shards = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output)),
+                              prefix=os.path.basename(output) + ".", suffix=".shards")
+    index = LogIndexWriter(output)
+    calls = turns = 0
+
+    def copy(shard, future):
+        """Append a parsed shard to the dataset, indexing its calls."""
+        nonlocal calls, turns
+        shard_calls, shard_turns, size = future.result()
+        position = 0
+        for offset, fields in shard_calls:
+            index.advance(offset - position)
+            index.mark("call", **fields)
+            position = offset
+        index.advance(size - position)
+        with open(shard, encoding='utf-8') as f:
+            shutil.copyfileobj(f, out)
+        os.remove(shard)
+        calls += len(shard_calls)
+        turns += shard_turns
+
+    try:
+        with open_text(output, 'w') as out, ProcessPoolExecutor(max_workers=jobs) as executor:
+            pending = deque()
+            for k, source in enumerate(sources):
+                shard = os.path.join(shards, f"{k}.jsonl")
+                pending.append((shard, executor.submit(write_shard, source, shard, blobs_file)))
+                if len(pending) > 2 * jobs:
+                    copy(*pending.popleft())
+            while pending:
+                copy(*pending.popleft())
+    finally:
+        index.close()
+        shutil.rmtree(shards, ignore_errors=True)
+    return len(sources), calls, turns
+
+def select_calls(dataset, source=None, run=None, phase=None):
+    """Index entries of the calls matching the filters, with the offset where each ends."""
+    entries = read_index(dataset)
+    if entries is None:
+        raise ValueError(f"{dataset} has no index")
+    calls = [e for e in entries if e["kind"] == "call"]
+    for k, e in enumerate(calls):
+        end = calls[k + 1]["offset"] if k + 1 < len(calls) else None
+        if source is not None and e["source"] != source and os.path.basename(e["source"]) != source:
+            continue
+        if run is not None and e["run"] != run:
+            continue
+        if phase is not None and e["phase"] != phase:
+            continue
+        yield e, end
+
+def query(dataset, source=None, run=None, phase=None, role=None, responses=False):
+    """Turns of the calls matching the filters, read through the index."""
+    # Offsets are those of the uncompressed text: a compressed dataset is decompressed once
+    data = read_bytes(dataset) if detect(dataset) != "none" else None
+    with open(dataset, 'rb') as f:
+        for e, end in select_calls(dataset, source, run, phase):
+            if data is not None:
+                chunk = data[e["offset"]:end]
+            else:
+                f.seek(e["offset"])
+                chunk = f.read(-1 if end is None else end - e["offset"])
+            for line in chunk.decode('utf-8').splitlines():
+                record = json.loads(line)
+                if (role is None or record["role"] == role) and (not responses or record["kind"] == "response"):
+                    yield record
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export agent conversations as an indexed dataset of turns')
+    sub = parser.add_subparsers(dest='command', required=True)
+    exp = sub.add_parser('export', help='Write the turns of text and event logs to a JSONL dataset')
+    exp.add_argument('paths', nargs='+', help='Logs, event logs or directories of them')
+    exp.add_argument('--output', '-o', required=True, help='Dataset file (.jsonl, or .jsonl.gz/.jsonl.zst to compress)')
+    exp.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                     help='Number of logs parsed in parallel (default: number of CPUs)')
+    exp.add_argument('--blobs', type=str, default=None,
+                     help='Blob file of logs written with --intern-blobs (default: the one next to each log)')
+    lst = sub.add_parser('list', help='List the calls of a dataset')
+    lst.add_argument('dataset', help='Dataset written by export')
+    qry = sub.add_parser('query', help='Print the turns of the matching calls as JSON lines')
+    qry.add_argument('dataset', help='Dataset written by export')
+    qry.add_argument('--source', help='Log the calls come from (path or file name)')
+    qry.add_argument('--run', type=int, help='Run number')
+    qry.add_argument('--phase', help='Phase of the calls (explore, improve, verify, verdict, check_complete, correct)')
+    qry.add_argument('--role', help='Only turns of this role (system, user, assistant)')
+    qry.add_argument('--responses', action='store_true', help='Only the responses of the calls')
+    qry.add_argument('--text', action='store_true', help='Print only the texts, separated by lines')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        sources, calls, turns = export(args.paths, args.output, args.jobs, args.blobs)
+        print(f"{turns} turn(s) of {calls} call(s) from {sources} log(s) written to {args.output}")
+    elif args.command == 'list':
+        for e, _ in select_calls(args.dataset):
+            print(f"{e['source']}  run {e['run']}  call {e['call']:>3}  {e['phase']}")
+    else:
+        for record in query(args.dataset, args.source, args.run, args.phase, args.role, args.responses):
+            if args.text:
+                sys.stdout.write(f"=== {record['source']} run {record['run']} call {record['call']} "
+                                 f"{record['phase']} {record['role']}\n{record['text']}\n")
+            else:
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
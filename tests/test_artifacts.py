@@ -0,0 +1,93 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of the solution artifact store: concurrent writers of one object,
+verdict histories and the ranking of stored candidates.
+"""
+
+import os
+import threading
+
+from artifacts import ArtifactStore, _write_once, count_findings, text_hash
+
+def test_write_once_concurrent_threads(tmp_path):
+    for trial in range(50):
+        path = str(tmp_path / f"object{trial}.txt")
+        created, errors = [], []
+        start = threading.Barrier(8)
+
+        def write(k):
+            start.wait()
+            try:
+                created.append(_write_once(path, f"text {k}" * 100))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(k,)) for k in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert created.count(True) == 1
+        with open(path) as f:
+            assert f.read().startswith("text ")
+    # No temporary file is left behind
+    assert sorted(os.listdir(tmp_path)) == sorted(f"object{trial}.txt" for trial in range(50))
+
+def test_write_once_existing(tmp_path):
+    path = str(tmp_path / "object.txt")
+    assert _write_once(path, "first")
+    assert not _write_once(path, "second")
+    with open(path) as f:
+        assert f.read() == "first"
+
+def test_put_is_content_addressed(tmp_path):
+    store = ArtifactStore(str(tmp_path), model="m", source="a.log")
+    h = store.put("solution", "problem")
+    assert h == text_hash("solution")
+    assert store.put("solution", "problem") == h
+    assert h in store
+    assert store.get(h) == "solution"
+    assert store.metadata(h)["problem_hash"] == text_hash("problem")
+    assert store.solutions_for("problem") == [h]
+
+def test_candidates_ranked_by_latest_verdict(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    good = store.put("good", "problem")
+    bad = store.put("bad", "problem")
+    store.put("unverified", "problem")
+    store.add_verdict(good, "no", "Critical Error: x")
+    store.add_verdict(good, "yes", "")
+    store.add_verdict(bad, "no", "Critical Error: x. Justification Gap: y")
+
+    candidates = store.candidates("problem")
+    assert [c["hash"] for c in candidates] == [good, bad]
+    assert candidates[0]["good_verify"] == "yes" and candidates[0]["passed"] == 1
+    assert candidates[1]["critical_errors"] == 1 and candidates[1]["justification_gaps"] == 1
+
+def test_count_findings():
+    assert count_findings(None) == (0, 0)
+    assert count_findings("Critical Error ... critical error ... Justification Gap") == (2, 1)
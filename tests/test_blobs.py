@@ -0,0 +1,108 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of blob interning: logged payloads expand back to the original texts,
+nested prompts are stored by reference, and a resumed agent reuses the
+blobs of its earlier session.
+"""
+
+import json
+
+from blobs import BlobStore, blob_path, expand, expand_blob, load_blobs
+
+PROBLEM = "Let $n$ be a positive integer. " * 20
+PROMPT = "### Core Instructions ###\n" + "Rigor is paramount. " * 30
+
+def payload(solution):
+    return {"contents": [{"role": "user", "parts": [{"text": PROMPT}, {"text": PROBLEM}]},
+                         {"role": "model", "parts": [{"text": solution}]},
+                         {"role": "user", "parts": [{"text": "short"}]}],
+            "generationConfig": {"temperature": 0.1}}
+
+def test_round_trip(tmp_path):
+    path = blob_path(str(tmp_path / "agent.log"))
+    store = BlobStore(path)
+    store.register(PROMPT)
+    store.register(PROBLEM)
+    data = payload("solution " * 100)
+    logged = json.dumps(store.intern(data), indent=4)
+    store.close()
+
+    # Long texts are replaced by references, short ones and other values are kept
+    assert PROMPT not in logged and "<<blob:" in logged
+    assert '"short"' in logged and '"temperature": 0.1' in logged
+    assert json.loads(expand(logged, load_blobs(path))) == data
+
+def test_texts_are_stored_once(tmp_path):
+    path = blob_path(str(tmp_path / "agent.log"))
+    store = BlobStore(path)
+    store.register(PROMPT)
+    for _ in range(5):
+        store.intern(payload("same solution " * 50))
+    store.close()
+    with open(path) as f:
+        entries = [json.loads(line) for line in f]
+    # The prompt, the problem and the solution
+    assert len(entries) == 3
+    assert len({e["hash"] for e in entries}) == 3
+
+def test_nested_blobs(tmp_path):
+    path = blob_path(str(tmp_path / "agent.log"))
+    store = BlobStore(path)
+    store.register(PROBLEM)
+    verification = "Problem:\n" + PROBLEM + "\nSolution:\n" + "step " * 100
+    ref = store.intern(verification)
+    store.close()
+    blobs = load_blobs(path)
+    h = ref[len("<<blob:"):-len(">>")]
+    # The verification prompt refers to the problem instead of repeating it
+    assert PROBLEM not in blobs[h]
+    assert expand_blob(blobs, h) == verification
+
+def test_resumed_store_reuses_blobs(tmp_path):
+    path = blob_path(str(tmp_path / "agent.log"))
+    store = BlobStore(path)
+    first = store.intern(PROMPT)
+    store.close()
+    store = BlobStore(path)
+    assert store.intern(PROMPT) == first
+    store.close()
+    with open(path) as f:
+        assert len(f.readlines()) == 1
+
+def test_torn_last_line_and_unknown_references(tmp_path):
+    path = blob_path(str(tmp_path / "agent.log"))
+    store = BlobStore(path)
+    ref = store.intern(PROMPT)
+    store.close()
+    with open(path, 'a') as f:
+        f.write('{"hash": "0123456789abcdef", "te')
+    blobs = load_blobs(path)
+    assert list(blobs) == [ref[len("<<blob:"):-len(">>")]]
+    text = json.dumps([ref, "<<blob:0123456789abcdef>>"])
+    assert json.loads(expand(text, blobs)) == [PROMPT, "<<blob:0123456789abcdef>>"]
+
+def test_compressed_log_shares_blob_file(tmp_path):
+    assert blob_path(str(tmp_path / "agent.log.gz")) == blob_path(str(tmp_path / "agent.log"))
@@ -0,0 +1,74 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of cooperative cancellation: calls run through a token, a cancel file
+abandoning an in-flight request, and the summary of what cancelling saved.
+"""
+
+import threading
+import time
+
+import pytest
+
+from cancel import CancelledError, CancelToken
+
+def test_run_returns_and_raises():
+    token = CancelToken(poll_interval=0.01)
+    assert token.run(lambda: 42) == 42
+    with pytest.raises(ValueError):
+        token.run(lambda: int("not a number"))
+    assert not token.cancelled()
+
+def test_cancel_file_abandons_request(tmp_path):
+    cancel_file = tmp_path / "cancel"
+    token = CancelToken(str(cancel_file), poll_interval=0.01)
+    token.record_call(10.0, 1000)
+    release = threading.Event()
+
+    def request():
+        release.wait(10)
+        return "late response"
+
+    threading.Timer(0.05, cancel_file.touch).start()
+    start = time.time()
+    with pytest.raises(CancelledError):
+        token.run(request)
+    # Stopped waiting long before the request would have returned
+    assert time.time() - start < 5
+    release.set()
+    assert token.reason == f"cancel file {cancel_file}"
+    summary = token.summary()
+    assert summary.startswith("Abandoned 1 in-flight request(s)")
+    assert not summary.endswith("unknown (no completed calls)")
+    # Later calls are not started
+    with pytest.raises(CancelledError):
+        token.run(lambda: 42)
+
+def test_summary_without_calls():
+    token = CancelToken()
+    token.cancel("signal SIGTERM")
+    with pytest.raises(CancelledError, match="SIGTERM"):
+        token.check()
+    assert token.summary().endswith("unknown (no completed calls)")
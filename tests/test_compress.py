@@ -0,0 +1,91 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of the compression of logs and memory files: round trips through
+open_text, appends, truncated files and compressing existing files.
+"""
+
+import gzip
+
+import pytest
+
+from compress import add_suffix, compress_file, detect, open_text, read_bytes, read_text, resolve
+
+LINES = [f"[2025-07-31 10:00:{k:02d}] >>>>>>> Line {k} é" for k in range(50)]
+
+def write_lines(path, lines, mode='w'):
+    with open_text(path, mode) as f:
+        for line in lines:
+            f.write(line + '\n')
+
+def round_trip(tmp_path, suffix):
+    path = str(tmp_path / ("agent.log" + suffix))
+    write_lines(path, LINES[:30])
+    # Appending adds a gzip member / zstd frame, read back as one text
+    write_lines(path, LINES[30:], mode='a')
+    with open_text(path) as f:
+        assert f.read().splitlines() == LINES
+    assert read_text(path).splitlines() == LINES
+    return path
+
+def test_plain_round_trip(tmp_path):
+    path = round_trip(tmp_path, "")
+    assert detect(path) == "none"
+
+def test_gzip_round_trip(tmp_path):
+    path = round_trip(tmp_path, ".gz")
+    assert detect(path) == "gzip"
+    # Compressed by content, not only by name
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        assert f.read().splitlines() == LINES
+
+def test_zstd_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    path = round_trip(tmp_path, ".zst")
+    assert detect(path) == "zstd"
+
+def test_truncated_gzip(tmp_path):
+    path = str(tmp_path / "agent.log.gz")
+    write_lines(path, LINES[:30])
+    write_lines(path, LINES[30:], mode='a')
+    with open(path, 'rb') as f:
+        data = f.read()
+    # A killed agent leaves its last member cut short: what was written of it is read too
+    with open(path, 'wb') as f:
+        f.write(data[:-10])
+    lines = read_bytes(path).decode('utf-8', errors='replace').splitlines()
+    assert lines[:30] == LINES[:30]
+    assert lines[:-1] == LINES[:len(lines) - 1]
+
+def test_compress_file(tmp_path):
+    path = str(tmp_path / "agent.mem")
+    write_lines(path, LINES)
+    target = compress_file(path, "gzip")
+    assert target == add_suffix(path, "gzip") == path + ".gz"
+    assert not (tmp_path / "agent.mem").exists()
+    assert resolve(path) == target
+    assert read_text(target).splitlines() == LINES
+    # Already compressed: the name is kept
+    assert add_suffix(target, "gzip") == target
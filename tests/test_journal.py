@@ -0,0 +1,112 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of the memory journal: replay of snapshots and updates, torn tails,
+compaction and legacy memory files.
+"""
+
+import json
+
+from journal import Journal, replay_journal
+
+def test_replay_folds_updates(tmp_path):
+    path = str(tmp_path / "agent.mem")
+    journal = Journal(path, fsync="never")
+    journal.append({"current_iteration": -1, "solution": "a", "verify": None})
+    journal.append({"current_iteration": 0, "solution": "a", "verify": "bug"})
+    journal.append({"current_iteration": 1, "solution": "b", "verify": "bug"})
+    journal.close()
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["op"] for r in records] == ["snapshot", "update", "update"]
+    # Only the changed fields are written
+    assert records[2]["set"] == {"current_iteration": 1, "solution": "b"}
+    assert replay_journal(path) == {"current_iteration": 1, "solution": "b", "verify": "bug"}
+
+def test_unchanged_state_writes_nothing(tmp_path):
+    path = str(tmp_path / "agent.mem")
+    journal = Journal(path, fsync="never")
+    journal.append({"current_iteration": 0})
+    journal.append({"current_iteration": 0})
+    journal.close()
+    with open(path) as f:
+        assert len(f.readlines()) == 1
+
+def test_torn_tail_is_ignored_and_cut_on_reopen(tmp_path):
+    path = str(tmp_path / "agent.mem")
+    journal = Journal(path, fsync="never")
+    journal.append({"current_iteration": 0, "solution": "a"})
+    journal.append({"current_iteration": 1})
+    journal.close()
+    # The process died in the middle of the next append
+    with open(path, 'a') as f:
+        f.write('{"op": "update", "set": {"current_iter')
+
+    assert replay_journal(path) == {"current_iteration": 1, "solution": "a"}
+
+    journal = Journal(path, fsync="never")
+    journal.append({"current_iteration": 2, "solution": "a"})
+    journal.close()
+    assert replay_journal(path) == {"current_iteration": 2, "solution": "a"}
+    with open(path) as f:
+        assert all(json.loads(line)["op"] in ("snapshot", "update") for line in f)
+
+def test_empty_or_torn_first_record(tmp_path):
+    path = tmp_path / "agent.mem"
+    path.write_text('{"op": "snap')
+    assert replay_journal(str(path)) is None
+
+def test_compaction_keeps_state(tmp_path):
+    path = str(tmp_path / "agent.mem")
+    journal = Journal(path, fsync="never", compact_every=3)
+    for i in range(10):
+        journal.append({"current_iteration": i, "solution": "s"})
+    journal.close()
+    with open(path) as f:
+        assert len(f.readlines()) <= 3
+    assert replay_journal(path) == {"current_iteration": 9, "solution": "s"}
+
+def test_legacy_memory_file(tmp_path):
+    path = str(tmp_path / "agent.mem")
+    with open(path, 'w') as f:
+        json.dump({"current_iteration": 3, "solution": "old"}, f, indent=2)
+    assert replay_journal(path) == {"current_iteration": 3, "solution": "old"}
+
+    # Reopening rewrites it as a journal
+    journal = Journal(path, fsync="never")
+    journal.append({"current_iteration": 4, "solution": "old"})
+    journal.close()
+    with open(path) as f:
+        assert json.loads(f.readline())["op"] == "snapshot"
+    assert replay_journal(path) == {"current_iteration": 4, "solution": "old"}
+
+def test_compressed_journal(tmp_path):
+    path = str(tmp_path / "agent.mem.gz")
+    journal = Journal(path, fsync="never")
+    journal.append({"current_iteration": 0, "solution": "a"})
+    journal.append({"current_iteration": 1, "solution": "a"})
+    journal.close()
+    assert replay_journal(path) == {"current_iteration": 1, "solution": "a"}
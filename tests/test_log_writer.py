@@ -0,0 +1,194 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of the log writer and the log index together: every index entry must
+point at its line, also across resumes, with a size cap and after an agent
+was killed before closing its log.
+"""
+
+import atexit
+import io
+import json
+import os
+import threading
+import time
+
+from compress import open_text
+from log_index import LogIndexWriter, find_solution, read_index, read_line_at
+from log_writer import LogWriter, tail_path
+
+SOLUTION = "### Detailed Solution ###\nsolution text"
+
+def open_log(path, append=False, max_bytes=None, flush="always"):
+    """Open a log as the agents' set_log_file() does."""
+    log_file = open_text(path, 'a' if append else 'w')
+    return LogWriter(log_file, LogIndexWriter(path, append), flush, stdout=io.StringIO(), max_bytes=max_bytes,
+                     tail=tail_path(path) if max_bytes else None, append=append)
+
+def write_run(writer, run, iterations=5, body=200):
+    """Log one run of the correction loop ending with a solution, as the agents do."""
+    writer.mark("run", run=run)
+    writer.write(f">>>>>>>>>>>>>>>>>>>>>>>>>> Run {run} of 10 ...", marker=True, keep=True)
+    for i in range(iterations):
+        writer.mark("iteration", iteration=i)
+        writer.write(f"Number of iterations: {i}, number of corrects: {i}, number of errors: 0")
+        writer.write(">>>>>>> Verify the solution.", marker=True)
+        writer.write("x" * body)
+    writer.write(f">>>>>>> Found a correct solution in run {run}.", marker=True, keep=True)
+    writer.mark("solution", run=run)
+    writer.write(json.dumps(SOLUTION, indent=4), keep=True)
+
+def kill(writer):
+    """Leave a writer as a killed agent would: written and flushed, but never closed."""
+    writer.flush()
+    writer.file.flush()
+    atexit.unregister(writer.close)
+    writer._closed = True
+
+def check_offsets(path):
+    """Every index entry points at the start of the line it describes."""
+    entries = read_index(path)
+    assert entries
+    for e in entries:
+        line = read_line_at(path, e["offset"])
+        if e["kind"] == "run":
+            assert line.startswith(f">>>>>>>>>>>>>>>>>>>>>>>>>> Run {e['run']} of"), (e, line)
+        elif e["kind"] == "iteration":
+            assert line.startswith(f"Number of iterations: {e['iteration']},"), (e, line)
+        elif e["kind"] == "marker":
+            assert line.startswith(e["text"]), (e, line)
+        elif e["kind"] == "solution":
+            assert json.loads(line) == SOLUTION, (e, line)
+    return entries
+
+def test_offsets(tmp_path):
+    for flush in ("always", "interval"):
+        path = str(tmp_path / f"{flush}.log")
+        writer = open_log(path, flush=flush)
+        write_run(writer, 0)
+        writer.close()
+        entries = check_offsets(path)
+        assert [e["kind"] for e in entries].count("iteration") == 5
+        assert find_solution(path) == SOLUTION
+
+def test_offsets_compressed(tmp_path):
+    path = str(tmp_path / "agent.log.gz")
+    writer = open_log(path)
+    write_run(writer, 0)
+    writer.close()
+    check_offsets(path)
+    assert find_solution(path) == SOLUTION
+
+def test_offsets_after_resume(tmp_path):
+    path = str(tmp_path / "agent.log")
+    writer = open_log(path)
+    write_run(writer, 0)
+    writer.close()
+    writer = open_log(path, append=True)
+    write_run(writer, 1)
+    writer.close()
+    entries = check_offsets(path)
+    assert [e["run"] for e in entries if e["kind"] == "solution"] == [0, 1]
+
+def test_size_cap(tmp_path):
+    path = str(tmp_path / "agent.log")
+    max_bytes = 4000
+    writer = open_log(path, max_bytes=max_bytes)
+    # The end of run 0 and the start of run 1 are past the head, and rotate out of the tail
+    write_run(writer, 0, iterations=10)
+    write_run(writer, 1, iterations=200)
+    writer.close()
+    logged = writer.stdout.getvalue()
+
+    assert not any(os.path.exists(tail_path(path) + suffix) for suffix in ("", ".1", ".idx"))
+    assert os.path.getsize(path) < max_bytes + 1000
+    with open(path) as f:
+        text = f.read()
+    head, note, rest = text.partition("[... log over its size cap (")
+    assert note and "bytes omitted here" in rest
+    # The head is a prefix of what was logged, and the log is in the order it was logged in
+    assert logged.startswith(head)
+    # followed by the keep lines of the omitted part
+    assert rest.split('\n', 1)[1].startswith(
+        ">>>>>>> Found a correct solution in run 0.\n" + json.dumps(SOLUTION, indent=4) + '\n' +
+        ">>>>>>>>>>>>>>>>>>>>>>>>>> Run 1 of 10 ...\n")
+    assert text.count("Run 1 of 10") == 1
+    assert text.index("Found a correct solution in run 0.") < text.index("Run 1 of 10")
+    assert text.rstrip('\n').endswith(">>>>>>> Found a correct solution in run 1.\n" + json.dumps(SOLUTION, indent=4))
+    entries = check_offsets(path)
+    assert [e["offset"] for e in entries] == sorted(e["offset"] for e in entries)
+    assert [e["run"] for e in entries if e["kind"] == "run"] == [0, 1]
+    assert [e["run"] for e in entries if e["kind"] == "solution"] == [0, 1]
+    assert find_solution(path) == SOLUTION
+
+def test_size_cap_resume_after_kill(tmp_path):
+    path = str(tmp_path / "agent.log")
+    writer = open_log(path, max_bytes=4000)
+    write_run(writer, 0, iterations=100)
+    kill(writer)
+    assert os.path.exists(tail_path(path))
+
+    writer = open_log(path, append=True, max_bytes=4000)
+    write_run(writer, 1, iterations=2)
+    writer.close()
+    with open(path) as f:
+        text = f.read()
+    assert "recovered after the agent was killed" in text
+    assert not os.path.exists(tail_path(path))
+    entries = check_offsets(path)
+    assert [e["run"] for e in entries if e["kind"] == "run"] == [0, 1]
+    assert find_solution(path) == SOLUTION
+
+def test_new_log_drops_stale_tail(tmp_path):
+    path = str(tmp_path / "agent.log")
+    for stale in (tail_path(path), tail_path(path) + ".1"):
+        with open(stale, 'w') as f:
+            f.write("stale line of an older session\n")
+    writer = open_log(path, max_bytes=4000)
+    write_run(writer, 0)
+    writer.close()
+    with open(path) as f:
+        assert "stale line" not in f.read()
+    assert not os.path.exists(tail_path(path)) and not os.path.exists(tail_path(path) + ".1")
+    check_offsets(path)
+
+def test_writes_racing_close(tmp_path):
+    # A small queue, so that the writing threads block on it while the log is closed
+    writer = LogWriter(open(tmp_path / "agent.log", 'w'), stdout=io.StringIO(), max_queue=4)
+    stop = threading.Event()
+
+    def spam():
+        while not stop.is_set():
+            writer.write("line")
+
+    threads = [threading.Thread(target=spam) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    writer.close()
+    stop.set()
+    for t in threads:
+        t.join(timeout=5)
+        assert not t.is_alive()
@@ -0,0 +1,106 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of the record/replay store: identical requests get their recorded
+answers in order, failed and retried calls leave no gap, sessions keep the
+recordings of several agents apart, and the miss policies.
+"""
+
+import pytest
+
+from replay import ReplayMissError, ResponseCache, session_of
+
+URL = "https://example.com/v1/generate"
+VERIFY = {"contents": [{"role": "user", "parts": [{"text": "Verify the solution."}]}]}
+CORRECT = {"contents": [{"role": "user", "parts": [{"text": "Correct the solution."}]}]}
+
+def send(cache, payload, answer, failures=0):
+    """One request as send_api_request makes it: looked up, retried after failures, then stored."""
+    for attempt in range(failures + 1):
+        key, cached = cache.lookup(payload)
+        if cached is not None:
+            return cached
+        if attempt < failures:
+            continue  # the API call failed; nothing is stored
+        cache.store(key, answer)
+        return answer
+
+def record(path, calls, session=""):
+    cache = ResponseCache(path, "record", namespace=URL, session=session)
+    for payload, answer, failures in calls:
+        send(cache, payload, answer, failures)
+
+def replay(path, payloads, session="", miss_policy="fail"):
+    cache = ResponseCache(path, "replay", miss_policy, URL, lambda text: {"mock": text}, session)
+    return [send(cache, payload, None) for payload in payloads], cache
+
+def test_identical_requests_replayed_in_order(tmp_path):
+    path = str(tmp_path / "cache.db")
+    record(path, [(VERIFY, "no", 0), (CORRECT, "fixed", 0), (VERIFY, "yes", 0), (VERIFY, "yes again", 0)])
+    answers, cache = replay(path, [VERIFY, CORRECT, VERIFY, VERIFY])
+    assert answers == ["no", "fixed", "yes", "yes again"]
+    assert (cache.hits, cache.misses) == (4, 0)
+
+def test_failed_call_leaves_no_gap(tmp_path):
+    path = str(tmp_path / "cache.db")
+    # The first verification failed twice before it got an answer
+    record(path, [(VERIFY, "no", 2), (CORRECT, "fixed", 1), (VERIFY, "yes", 0)])
+    answers, cache = replay(path, [VERIFY, CORRECT, VERIFY])
+    assert answers == ["no", "fixed", "yes"]
+    assert cache.misses == 0
+
+def test_miss_stops_the_agent(tmp_path):
+    path = str(tmp_path / "cache.db")
+    record(path, [(VERIFY, "no", 0)])
+    with pytest.raises(ReplayMissError):
+        replay(path, [VERIFY, VERIFY])
+    # Not caught by the agents' generic retry handlers
+    assert not issubclass(ReplayMissError, Exception)
+
+def test_mock_and_passthrough_misses(tmp_path):
+    path = str(tmp_path / "cache.db")
+    record(path, [(VERIFY, "no", 0)])
+    answers, cache = replay(path, [VERIFY, CORRECT], miss_policy="mock")
+    assert answers[0] == "no" and "mock" in answers[1]
+
+    # A passthrough miss is sent for real and recorded after the existing responses
+    cache = ResponseCache(path, "replay", "passthrough", URL)
+    assert send(cache, VERIFY, None) == "no"
+    assert send(cache, VERIFY, "yes") == "yes"
+    answers, _ = replay(path, [VERIFY, VERIFY])
+    assert answers == ["no", "yes"]
+
+def test_sessions_keep_agents_apart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    record(path, [(VERIFY, "agent 0", 0)], session="agent_00.log")
+    record(path, [(VERIFY, "agent 1", 0)], session="agent_01.log")
+    assert replay(path, [VERIFY], session="agent_00.log")[0] == ["agent 0"]
+    assert replay(path, [VERIFY], session="agent_01.log")[0] == ["agent 1"]
+    with pytest.raises(ReplayMissError):
+        replay(path, [VERIFY], session="agent_02.log")
+
+def test_session_of():
+    assert session_of(None) == ""
+    assert session_of("logs/p1/agent_03.log.gz") == "agent_03.log"
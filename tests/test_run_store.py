@@ -0,0 +1,99 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of the run store: batched writes, flushes at the end of a run and at
+close, and several agents sharing one database.
+"""
+
+import atexit
+import sqlite3
+
+from run_store import RunStore
+
+PROBLEM = "Determine all positive integers $n$ such that ..."
+
+def open_store(path, agent="agent_00", batch_size=5):
+    store = RunStore(str(path), agent, "gemini-2.5-pro", f"{agent}.log", batch_size=batch_size,
+                     flush_interval=3600)
+    atexit.unregister(store.close)
+    return store
+
+def count(path, table):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_batched_writes(tmp_path):
+    db = tmp_path / "runs.db"
+    store = open_store(db)
+    run_id = store.start_run(PROBLEM, 0)
+    # The run row is written right away, so that other rows can point at it
+    assert count(db, "runs") == 1
+
+    for i in range(4):
+        store.record_iteration(i, i, 0, "yes", f"solution {i}")
+    # Buffered until batch_size rows are pending
+    assert count(db, "iterations") == 0
+    store.record_call("verify", 100.0, 1.5, 1000, 2000)
+    assert (count(db, "iterations"), count(db, "calls")) == (4, 1)
+
+    store.record_iteration(4, 4, 0, "yes", "solution 4")
+    store.end_run("solved", solved=True)
+    assert count(db, "iterations") == 5
+    conn = sqlite3.connect(str(db))
+    assert conn.execute("SELECT status, solved FROM runs WHERE id = ?", (run_id,)).fetchone() == ("solved", 1)
+    assert conn.execute("SELECT iteration FROM iterations WHERE run_id = ? ORDER BY iteration",
+                        (run_id,)).fetchall() == [(i,) for i in range(5)]
+    conn.close()
+    store.close()
+
+def test_close_flushes(tmp_path):
+    db = tmp_path / "runs.db"
+    store = open_store(db, batch_size=1000)
+    store.start_run(PROBLEM, 0)
+    store.record_call("explore", 100.0, 2.0, 1000, 2000, output_tokens=500)
+    assert count(db, "calls") == 0
+    store.close()
+    assert count(db, "calls") == 1
+    # Flushing a closed store does nothing
+    store.flush()
+
+def test_shared_database(tmp_path):
+    db = tmp_path / "runs.db"
+    stores = [open_store(db, agent=f"agent_{k:02d}") for k in range(3)]
+    for k, store in enumerate(stores):
+        store.start_run(PROBLEM, k)
+        # The same solution from every agent is stored once, with a verdict per agent
+        store.record_verdict("### Detailed Solution ###\nsame text", "yes", "")
+        store.end_run("solved", solved=True)
+    for store in stores:
+        store.close()
+    assert (count(db, "runs"), count(db, "solutions"), count(db, "verdicts")) == (3, 1, 3)
+    conn = sqlite3.connect(str(db))
+    assert [row[0] for row in conn.execute("SELECT agent FROM runs ORDER BY id")] == \
+           ["agent_00", "agent_01", "agent_02"]
+    conn.close()
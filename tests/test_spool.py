@@ -0,0 +1,92 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of the response spool: completed responses are reused only by a
+resumed agent, interrupted output is discarded, and checkpoints (or their
+absence) decide how long completed responses are kept.
+"""
+
+import os
+
+from spool import Spool, spool_status
+
+PAYLOAD = {"model": "gpt-5", "input": [{"role": "user", "content": "Solve the problem."}]}
+RESPONSE = {"output": [{"type": "message", "content": [{"type": "output_text", "text": "answer"}]}]}
+
+def stream(spool, payload=PAYLOAD, response=RESPONSE):
+    call = spool.begin(payload, "explore")
+    call.event("response.output_text.delta", "answer")
+    call.finish(response)
+
+def done_files(root):
+    return [name for name in os.listdir(root) if name.endswith(".done")]
+
+def test_resume_reuses_completed_responses(tmp_path):
+    root = str(tmp_path / "agent_00.spool")
+    stream(Spool(root))
+    assert len(done_files(root)) == 1
+
+    # The agent crashed before its next checkpoint and is resumed
+    spool = Spool(root, resume=True)
+    assert spool.recoverable == 1
+    assert spool.recover(PAYLOAD) == RESPONSE
+    # Served once only
+    assert spool.recover(PAYLOAD) is None
+    assert spool.recover({"model": "gpt-5", "input": []}) is None
+    spool.checkpoint()
+    assert done_files(root) == []
+
+def test_fresh_start_clears_the_spool(tmp_path):
+    root = str(tmp_path / "agent_00.spool")
+    stream(Spool(root))
+    spool = Spool(root)
+    assert spool.recoverable == 0
+    assert spool.recover(PAYLOAD) is None
+    assert os.listdir(root) == []
+
+def test_without_checkpoints_nothing_is_kept(tmp_path):
+    root = str(tmp_path / "agent_00.spool")
+    spool = Spool(root, checkpoints=False)
+    stream(spool)
+    assert os.listdir(root) == []
+
+    # A response left by an agent that did checkpoint is deleted once served
+    stream(Spool(root))
+    spool = Spool(root, resume=True, checkpoints=False)
+    assert spool.recover(PAYLOAD) == RESPONSE
+    assert os.listdir(root) == []
+
+def test_interrupted_calls(tmp_path):
+    root = str(tmp_path / "agent_00.spool")
+    call = Spool(root).begin(PAYLOAD, "verify")
+    call.event("response.output_text.delta", "partial answer")
+    calls = spool_status(root)
+    assert [(c["state"], c["phase"], c["chars"]) for c in calls] == [("streaming", "verify", len("partial answer"))]
+
+    # The process died mid-generation: the partial output cannot be reused
+    spool = Spool(root, resume=True)
+    assert spool.discarded_chars == len("partial answer")
+    assert spool.recoverable == 0
+    assert os.listdir(root) == []
@@ -0,0 +1,137 @@
+"""
+MIT License
+
+Copyright (c) 2025 Lin Yang, Yichen Huang
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Tests of the transcript export: the dataset index, queries through it, and
+event logs with interned blobs.
+"""
+
+import json
+import os
+
+from blobs import BlobStore, blob_path
+from log_index import read_index
+from transcripts import export, query, select_calls
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGS = [os.path.join(ROOT, "run_logs", "solution_02_agent_08.log"),
+        os.path.join(ROOT, "run_logs_gpt5", "solution_p1_gpt5.log")]
+
+def read_dataset(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_export_index(tmp_path):
+    dataset = str(tmp_path / "turns.jsonl")
+    sources, calls, turns = export(LOGS, dataset, jobs=2)
+    records = read_dataset(dataset)
+    assert sources == 2 and turns == len(records) and calls > 0
+    assert {r["source"] for r in records} == set(LOGS)
+    assert {r["role"] for r in records} >= {"user", "assistant"}
+
+    # One entry per call of each source, pointing at its first turn
+    entries = [e for e in read_index(dataset) if e["kind"] == "call"]
+    assert len(entries) == calls
+    keys = [(e["source"], e["run"], e["call"]) for e in entries]
+    assert len(set(keys)) == len(keys)
+    offsets = {}
+    offset = 0
+    with open(dataset, 'rb') as f:
+        for line in f:
+            offsets[offset] = json.loads(line)
+            offset += len(line)
+    for e in entries:
+        record = offsets[e["offset"]]
+        assert (record["source"], record["run"], record["call"], record["phase"]) == \
+               (e["source"], e["run"], e["call"], e["phase"])
+
+def test_query_matches_scan(tmp_path):
+    dataset = str(tmp_path / "turns.jsonl")
+    export(LOGS, dataset, jobs=1)
+    records = read_dataset(dataset)
+
+    for source in LOGS:
+        assert list(query(dataset, source=os.path.basename(source))) == \
+               [r for r in records if r["source"] == source]
+    assert list(query(dataset, phase="verify", role="assistant")) == \
+           [r for r in records if r["phase"] == "verify" and r["role"] == "assistant"]
+    assert list(query(dataset, run=0, responses=True)) == \
+           [r for r in records if r["run"] == 0 and r["kind"] == "response"]
+    assert list(select_calls(dataset, source="missing.log")) == []
+
+def test_compressed_dataset(tmp_path):
+    plain, compressed = str(tmp_path / "turns.jsonl"), str(tmp_path / "turns.jsonl.gz")
+    export(LOGS[:1], plain, jobs=1)
+    export(LOGS[:1], compressed, jobs=1)
+    assert list(query(compressed, phase="verify")) == list(query(plain, phase="verify"))
+
+def test_event_log_with_blobs(tmp_path):
+    problem = "Determine all positive integers $n$ such that ... " * 10
+    store = BlobStore(blob_path(str(tmp_path / "agent_00.log")))
+    store.register(problem)
+    events = str(tmp_path / "agent_00.events.jsonl")
+    with open(events, 'w') as f:
+        for call, phase in enumerate(("explore", "verify")):
+            payload = {"systemInstruction": {"parts": [{"text": "system prompt"}]},
+                       "contents": [{"role": "user", "parts": [{"text": problem}]}]}
+            response = {"candidates": [{"content": {"parts": [{"text": f"answer {call}"}]}}]}
+            entry = {"t": 100.0 + call, "event": "call", "run": 0, "iteration": None, "phase": phase,
+                     "latency": 0.5, "payload": store.intern(payload), "response": response}
+            f.write(json.dumps(entry) + '\n')
+        # Events without bodies give no turns
+        f.write(json.dumps({"t": 103.0, "event": "verdict", "run": 0, "passed": True}) + '\n')
+    store.close()
+
+    dataset = str(tmp_path / "turns.jsonl")
+    sources, calls, turns = export([str(tmp_path)], dataset, jobs=1)
+    assert (sources, calls, turns) == (1, 2, 6)
+    records = read_dataset(dataset)
+    assert [(r["phase"], r["role"]) for r in records] == [
+        ("explore", "system"), ("explore", "user"), ("explore", "assistant"),
+        ("verify", "system"), ("verify", "user"), ("verify", "assistant")]
+    # The problem was interned in the event log and is expanded in the dataset
+    assert records[1]["text"] == problem
+    assert [r["text"] for r in query(dataset, phase="verify", responses=True)] == ["answer 1"]
+
+def test_sources_streamed_in_order(tmp_path):
+    # More sources than the window of pending shards of one worker
+    logs = []
+    for k in range(5):
+        log = str(tmp_path / "logs" / f"agent_{k:02d}.log")
+        os.makedirs(os.path.dirname(log), exist_ok=True)
+        with open(LOGS[k % 2]) as src, open(log, 'w') as dst:
+            dst.write(src.read())
+        logs.append(log)
+    dataset = str(tmp_path / "turns.jsonl")
+    sources, calls, turns = export(list(reversed(logs)), dataset, jobs=1)
+    records = read_dataset(dataset)
+    assert sources == 5 and turns == len(records)
+    order = []
+    for r in records:
+        if not order or order[-1] != r["source"]:
+            order.append(r["source"])
+    assert order == list(reversed(logs))
+    assert len([e for e in read_index(dataset) if e["kind"] == "call"]) == calls
+    # The shards are removed
+    assert sorted(os.listdir(tmp_path)) == ["logs", "turns.jsonl", "turns.jsonl.idx"]